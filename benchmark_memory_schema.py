@@ -0,0 +1,75 @@
+"""
+Compact Schema Memory Benchmark
+Raw object-heavy frames vs `compact_schema` normalized frames
+
+Reports deep memory per frame and per row, the largest per-column savings,
+and the time of the transactions-to-GNAF join on string pids vs integer keys.
+Frames are tiled to show how the footprint scales with row count.
+"""
+
+import time
+import pandas as pd
+from compact_schema import frame_memory, normalize_gnaf, normalize_transactions
+from enrich_transactions import principal_geocodes
+
+SCALES = [1, 10, 50]
+
+print("="*80)
+print("🧮 COMPACT SCHEMA MEMORY BENCHMARK")
+print("   object columns vs categoricals / integer codes / small dtypes")
+print("="*80)
+
+raw_trans = pd.read_parquet('transactions.parquet')
+raw_gnaf = pd.read_parquet('gnaf_prop.parquet')
+
+rows = []
+for scale in SCALES:
+    trans = pd.concat([raw_trans] * scale, ignore_index=True)
+    gnaf = pd.concat([raw_gnaf] * scale, ignore_index=True)
+
+    start = time.perf_counter()
+    compact_trans = normalize_transactions(trans)
+    compact_gnaf = normalize_gnaf(gnaf)
+    normalize_time = time.perf_counter() - start
+
+    # Join as the enrichment stage does: one geocode per pid
+    geocodes = principal_geocodes(compact_gnaf)
+    string_geocodes = geocodes.merge(
+        compact_gnaf[['gnaf_key', 'gnaf_pid']].drop_duplicates('gnaf_key'), on='gnaf_key'
+    )[['gnaf_pid', 'latitude', 'longitude']].astype({'gnaf_pid': object})
+
+    start = time.perf_counter()
+    trans.merge(string_geocodes, on='gnaf_pid', how='left')
+    string_join = time.perf_counter() - start
+
+    start = time.perf_counter()
+    compact_trans.merge(geocodes, on='gnaf_key', how='left')
+    integer_join = time.perf_counter() - start
+
+    rows.append({
+        'rows': len(trans),
+        'trans_raw_mb': frame_memory(trans) / 1e6,
+        'trans_compact_mb': frame_memory(compact_trans) / 1e6,
+        'trans_bytes_per_row': frame_memory(compact_trans) / len(trans),
+        'gnaf_raw_mb': frame_memory(gnaf) / 1e6,
+        'gnaf_compact_mb': frame_memory(compact_gnaf) / 1e6,
+        'normalize_s': normalize_time,
+        'string_join_s': string_join,
+        'integer_join_s': integer_join
+    })
+    print(f"   x{scale:<3} {len(trans):>9,} transactions | "
+          f"{rows[-1]['trans_raw_mb']:8.1f} MB -> {rows[-1]['trans_compact_mb']:8.1f} MB")
+
+print("\n" + pd.DataFrame(rows).to_string(index=False))
+
+# Per-column savings at 1x
+compact = normalize_transactions(raw_trans)
+columns = pd.DataFrame({
+    'raw_dtype': raw_trans.dtypes.astype(str),
+    'compact_dtype': compact[raw_trans.columns].dtypes.astype(str),
+    'raw_kb': raw_trans.memory_usage(deep=True, index=False) / 1e3,
+    'compact_kb': compact[raw_trans.columns].memory_usage(deep=True, index=False) / 1e3
+})
+columns['saved_kb'] = columns['raw_kb'] - columns['compact_kb']
+print("\nTransactions columns (1x):")
+print(columns.sort_values('saved_kb', ascending=False).round(1).to_string())
@@ -0,0 +1,75 @@
+"""
+Parallel Geometry Benchmark
+Scaling of the road-distance and parcel-join stages from 1 to N worker processes
+
+Points are sampled (with replacement) from the GNAF coordinates. The baseline
+loads the layer and calls the kernel directly in this process (no pool, no
+shared memory), so speedups are against real serial work, not a 1-worker pool
+paying pickling and IPC overhead. Every pooled run is checked against the
+baseline result to confirm the parallel merge is deterministic.
+
+Usage: python3 benchmark_parallel_geometry.py [n_points]
+"""
+
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from parallel_geometry import parallel_parcel_ids, parallel_road_distances
+from parcel_enrichment import assign_parcels, load_parcels
+from road_proximity import MAJOR_ROAD_CLASSES, load_major_roads, nearest_road_distance
+
+N_POINTS = int(sys.argv[1]) if len(sys.argv) > 1 else 400_000
+MAX_WORKERS = os.cpu_count() or 1
+WORKER_COUNTS = sorted({1, 2, 4, 8, 16, 32, MAX_WORKERS} & set(range(1, MAX_WORKERS + 1)))
+
+print("="*80)
+print("⏱️  PARALLEL GEOMETRY BENCHMARK")
+print(f"   {N_POINTS:,} points | workers: {WORKER_COUNTS}")
+print("="*80)
+
+df_gnaf = pd.read_parquet('gnaf_prop.parquet', columns=['latitude', 'longitude']).dropna()
+rng = np.random.default_rng(42)
+sample = df_gnaf.iloc[rng.integers(0, len(df_gnaf), N_POINTS)]
+lon, lat = sample['longitude'].values, sample['latitude'].values
+
+# (in-process kernel including its layer load, pooled run) per stage
+stages = {
+    'road distance': (
+        lambda: nearest_road_distance(lon, lat, load_major_roads('roads.gpkg', list(MAJOR_ROAD_CLASSES))),
+        lambda workers: parallel_road_distances(lon, lat, workers=workers)
+    ),
+    'parcel join': (
+        lambda: assign_parcels(lon, lat, load_parcels('cadastre.gpkg')),
+        lambda workers: parallel_parcel_ids(lon, lat, workers=workers)
+    )
+}
+
+rows = []
+for stage, (serial, pooled) in stages.items():
+    start = time.perf_counter()
+    baseline = serial()
+    baseline_time = time.perf_counter() - start
+    rows.append({'stage': stage, 'workers': 'in-process', 'seconds': baseline_time,
+                 'speedup': 1.0, 'efficiency': 1.0, 'identical': True})
+    print(f"   {stage:<14} | in-process | {baseline_time:8.3f}s")
+
+    for workers in WORKER_COUNTS:
+        start = time.perf_counter()
+        result = pooled(workers)
+        elapsed = time.perf_counter() - start
+        identical = np.array_equal(result, baseline, equal_nan=True)
+
+        rows.append({
+            'stage': stage,
+            'workers': workers,
+            'seconds': elapsed,
+            'speedup': baseline_time / elapsed,
+            'efficiency': baseline_time / elapsed / workers,
+            'identical': identical
+        })
+        print(f"   {stage:<14} | {workers:>2} workers | {elapsed:8.3f}s | "
+              f"speedup {baseline_time / elapsed:5.2f}x | identical: {identical}")
+
+print("\n" + pd.DataFrame(rows).to_string(index=False))
@@ -0,0 +1,59 @@
+"""
+Quantile Sketch Benchmark
+Exact slice medians vs merged per-(suburb, month) sketches for ad-hoc windows
+
+Builds the sketch store once, then answers the 1/3/5/9-year period medians
+from it and from raw rows, reporting timings and the relative error.
+"""
+
+import time
+import numpy as np
+import pandas as pd
+from enrich_transactions import load_enriched_transactions
+from quantile_sketch import SketchStore
+
+print("="*80)
+print("⏱️  QUANTILE SKETCH BENCHMARK")
+print("   Raw-row medians vs merged (suburb, month) sketches")
+print("="*80)
+
+df_trans = load_enriched_transactions(columns=['suburb', 'sale_date', 'price'])
+latest_date = df_trans['sale_date'].max()
+windows = {
+    '1-Year': latest_date - pd.DateOffset(months=12),
+    '3-Year': latest_date - pd.DateOffset(years=3),
+    '5-Year': latest_date - pd.DateOffset(years=5),
+    '9-Year': pd.Timestamp('2016-01-01')
+}
+
+start = time.perf_counter()
+store = SketchStore.build(df_trans)
+build_time = time.perf_counter() - start
+print(f"Sketch store: {len(store):,} centroids for {len(df_trans):,} sales | built in {build_time:.3f}s")
+
+rows = []
+for name, window_start in windows.items():
+    # Sketches are month-grained, so compare against month-aligned raw windows
+    month_start = window_start.to_period('M').to_timestamp()
+
+    start = time.perf_counter()
+    in_window = df_trans[df_trans['sale_date'] >= month_start]
+    exact = in_window.groupby('suburb')['price'].median()
+    exact_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    sketched = store.window_quantiles(month_start, latest_date)
+    sketch_time = time.perf_counter() - start
+
+    relative_error = ((sketched - exact) / exact).abs().dropna()
+    rows.append({
+        'window': name,
+        'suburbs': len(exact),
+        'exact_s': exact_time,
+        'sketch_s': sketch_time,
+        'max_rel_error': float(relative_error.max()),
+        'mean_rel_error': float(relative_error.mean()),
+        'exact_suburbs': int(np.isclose(sketched.reindex(exact.index), exact).sum())
+    })
+
+print("\n" + pd.DataFrame(rows).to_string(index=False))
@@ -0,0 +1,113 @@
+"""
+Compact Transaction Schema
+Normalizes raw transactions and GNAF frames to small fixed-width dtypes
+
+The raw Parquet files load almost every column as Python `object` strings.
+This stage dictionary-encodes the repeating labels as categoricals, turns
+mesh-block / SA1 / gid strings into integers, keeps postcodes as
+zero-padded 4-character categories (NT postcodes start with 0), parses
+`building_size` ('185 m²') into a number, stores room counts as nullable
+uint8 and derives an integer `gnaf_key` from `gnaf_pid` so GNAF joins are
+integer hash joins. Columns absent from a frame (projected reads) are skipped.
+"""
+
+import numpy as np
+import pandas as pd
+
+# GNAF pids are 'GA' + state + digits, e.g. GANSW705844500
+STATE_CODES = {'NSW': 1, 'VIC': 2, 'QLD': 3, 'SA': 4, 'WA': 5, 'TAS': 6, 'NT': 7, 'ACT': 8, 'OT': 9}
+PID_STATE_FACTOR = 10 ** 12
+POSTCODE_WIDTH = 4
+
+CATEGORY_COLUMNS = [
+    'gnaf_pid', 'listing_source', 'state', 'suburb', 'sal', 'typ', 'market',
+    'source', 'property_type', 'date_sold', 'display_price'
+]
+INTEGER_COLUMNS = {'gid': 'Int64', 'mb': 'Int64', 'sa1': 'Int64'}
+POSTCODE_COLUMNS = ['poa']
+COUNT_COLUMNS = ['bedrooms', 'bathrooms', 'garage_spaces']
+FLOAT32_COLUMNS = ['land_size', 'hedonic_price', 'yield']
+
+GNAF_CATEGORY_COLUMNS = ['geocode_type', 'locality_name', 'postcode', 'state', 'alias_principal']
+GNAF_SMALL_INT_COLUMNS = ['confidence', 'reliability']
+
+
+def gnaf_pid_key(pids):
+    """
+    int64 key for each gnaf_pid; <NA> only where the pid is missing
+
+    Pids of the form 'GA' + known state + fewer than 13 digits map to
+    state code * 10^12 + digits. Any other pid gets a negative key from a
+    stable hash of the string, so it never collides with a parsed key and
+    still joins across frames.
+    """
+    pids = pd.Series(pids, dtype=object).astype('string')
+    parts = pids.str.extract(r'^GA([A-Z]+)(\d{1,12})$')
+    state = parts[0].map(STATE_CODES).astype('Int64')
+    digits = pd.to_numeric(parts[1], errors='coerce').astype('Int64')
+    keys = state * PID_STATE_FACTOR + digits
+
+    fallback = keys.isna() & pids.notna()
+    if fallback.any():
+        hashes = pd.util.hash_pandas_object(pids[fallback].astype(object), index=False).to_numpy()
+        keys[fallback] = -(hashes >> np.uint64(1)).astype('int64') - 1
+    return keys.rename('gnaf_key')
+
+
+def normalize_postcodes(codes):
+    """Postcodes as zero-padded 4-character categories ('800', 800 and 800.0 all become '0800')"""
+    codes = pd.Series(codes, dtype=object).astype('string').str.strip()
+    codes = codes.str.replace(r'\.0+$', '', regex=True).str.zfill(POSTCODE_WIDTH)
+    return codes.astype('category')
+
+
+def parse_building_size(sizes):
+    """Numeric square metres from strings such as '185 m²' or '1,204 m²'"""
+    number = pd.Series(sizes, dtype=object).astype('string').str.extract(r'([\d,.]+)')[0]
+    return pd.to_numeric(number.str.replace(',', '', regex=False), errors='coerce').astype('float32')
+
+
+def normalize_transactions(df):
+    """Transactions frame with compact dtypes plus an integer `gnaf_key`"""
+    df = df.copy()
+    if 'gnaf_pid' in df:
+        df['gnaf_key'] = gnaf_pid_key(df['gnaf_pid']).to_numpy()
+    for column in CATEGORY_COLUMNS:
+        if column in df:
+            df[column] = df[column].astype('category')
+    for column, dtype in INTEGER_COLUMNS.items():
+        if column in df:
+            df[column] = pd.to_numeric(df[column], errors='coerce').round().astype(dtype)
+    for column in POSTCODE_COLUMNS:
+        if column in df:
+            df[column] = normalize_postcodes(df[column])
+    for column in COUNT_COLUMNS:
+        if column in df:
+            df[column] = pd.to_numeric(df[column], errors='coerce').round().clip(0, 255).astype('UInt8')
+    for column in FLOAT32_COLUMNS:
+        if column in df:
+            df[column] = df[column].astype('float32')
+    if 'building_size' in df:
+        df['building_size'] = parse_building_size(df['building_size'])
+    return df
+
+
+def normalize_gnaf(df):
+    """GNAF frame with compact dtypes and an integer `gnaf_key` (rows without a pid dropped)"""
+    df = df.copy()
+    df['gnaf_key'] = gnaf_pid_key(df['gnaf_pid']).to_numpy()
+    df = df[df['gnaf_key'].notna()]
+    df['gnaf_key'] = df['gnaf_key'].astype('int64')
+    df['gnaf_pid'] = df['gnaf_pid'].astype('category')
+    for column in GNAF_CATEGORY_COLUMNS:
+        if column in df:
+            df[column] = df[column].astype('category')
+    for column in GNAF_SMALL_INT_COLUMNS:
+        if column in df:
+            df[column] = df[column].astype(np.int8)
+    return df
+
+
+def frame_memory(df):
+    """Deep memory footprint of a frame in bytes"""
+    return int(df.memory_usage(deep=True).sum())
@@ -6,44 +6,29 @@ Supports: 1-Year, 3-Year, 5-Year, 9-Year analysis periods
 """
 
 from flask import Flask, render_template, jsonify, request
-import pandas as pd
 import json
 import os
+from functools import lru_cache
 from pathlib import Path
+from response_cache import PreparedResponse
+from hot_reload import DEFAULT_INTERVAL as RELOAD_INTERVAL, ArtifactWatcher, artifact_signature
+from records import group_records, read_records
+from snapshot_reader import COMPARISON_SNAPSHOT_FILENAME, COMPONENT_WEIGHTS_FILENAME, SNAPSHOT_FILENAME
 
-app = Flask(__name__)
+# pandas, numpy and pyarrow are imported inside the loaders and endpoints
+# that need them, so importing the app (a serverless cold start) stays light
 
-# Load all period data
-def load_all_period_data():
-    """Load all analysis periods"""
-    try:
-        base_dir = Path(__file__).parent
-        
-        periods = {}
-        for period in ['1_year', '3_year', '5_year', '9_year']:
-            csv_file = base_dir / f'investment_scores_{period}.csv'
-            if csv_file.exists():
-                periods[period] = pd.read_csv(csv_file).fillna(0).round(2)
-            else:
-                # Try parent directory
-                csv_file = base_dir.parent / f'investment_scores_{period}.csv'
-                if csv_file.exists():
-                    periods[period] = pd.read_csv(csv_file).fillna(0).round(2)
-        
-        # Load comparison data
-        comparison_file = base_dir / 'multi_period_comparison.csv'
-        if not comparison_file.exists():
-            comparison_file = base_dir.parent / 'multi_period_comparison.csv'
-        
-        comparison_df = pd.read_csv(comparison_file).fillna(0) if comparison_file.exists() else pd.DataFrame()
-        
-        return periods, comparison_df
-    
-    except Exception as e:
-        print(f"Error loading data: {e}")
-        return {}, pd.DataFrame()
+app = Flask(__name__)
+# Static assets (dashboard.js, dashboard.css) are revalidated on every load:
+# unchanged files come back as 304 via their ETag / Last-Modified
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = None
 
-periods_data, comparison_data = load_all_period_data()
+BASE_DIR = Path(__file__).parent
+PERIOD_IDS = ['1_year', '3_year', '5_year', '9_year']
+# Score source: 'auto' (snapshot unless a CSV export is newer), 'snapshot' or 'csv'
+SCORE_SOURCE = os.environ.get('DASHBOARD_SCORE_SOURCE', 'auto')
+# Memoized /api/score responses
+LIVE_CACHE_SIZE = int(os.environ.get('LIVE_SCORE_CACHE_SIZE', 256))
 
 # Period display names
 PERIOD_NAMES = {
@@ -53,6 +38,246 @@ PERIOD_NAMES = {
     '9_year': '9-Year'
 }
 
+def artifact_candidates(filename):
+    """Dashboard copy first, then the pipeline output in the parent directory"""
+    return [BASE_DIR / filename, BASE_DIR.parent / filename]
+
+def find_artifact(filename):
+    """First existing candidate path, or None"""
+    for path in artifact_candidates(filename):
+        if path.exists():
+            return path
+    return None
+
+# Files whose changes trigger a hot reload
+WATCHED_ARTIFACTS = [
+    path
+    for filename in [f'investment_scores_{period}.csv' for period in PERIOD_IDS]
+                    + ['multi_period_comparison.csv', 'suburb_score_history.csv',
+                       SNAPSHOT_FILENAME, COMPARISON_SNAPSHOT_FILENAME, COMPONENT_WEIGHTS_FILENAME]
+    for path in artifact_candidates(filename)
+]
+
+def snapshot_is_current(snapshot_file):
+    """True unless a CSV export is newer than the snapshot (e.g. written by an older pipeline)"""
+    csv_files = [find_artifact(f'investment_scores_{period}.csv') for period in PERIOD_IDS]
+    csv_files.append(find_artifact('multi_period_comparison.csv'))
+    snapshot_mtime = snapshot_file.stat().st_mtime
+    return all(csv_file is None or csv_file.stat().st_mtime <= snapshot_mtime for csv_file in csv_files)
+
+# Load all period data
+def load_all_period_data():
+    """All analysis periods and the comparison table as lists of row dicts"""
+    snapshot_file = find_artifact(SNAPSHOT_FILENAME) if SCORE_SOURCE != 'csv' else None
+    if snapshot_file and (SCORE_SOURCE == 'snapshot' or snapshot_is_current(snapshot_file)):
+        # Memory-mapped: already filled and rounded by the pipeline, nothing to parse
+        from snapshot_reader import read_score_snapshot
+        try:
+            tables, comparison = read_score_snapshot(snapshot_file)
+        except ValueError as e:
+            print(f"Snapshot unusable, reading the CSV exports: {e}")
+        else:
+            periods = {period: tables[period].to_pylist() for period in PERIOD_IDS if period in tables}
+            return periods, comparison.to_pylist()
+    
+    periods = {}
+    for period in PERIOD_IDS:
+        csv_file = find_artifact(f'investment_scores_{period}.csv')
+        if csv_file:
+            periods[period] = read_records(csv_file)
+    
+    # Load comparison data (filled, not rounded)
+    comparison_file = find_artifact('multi_period_comparison.csv')
+    comparison = read_records(comparison_file, decimals=None) if comparison_file else []
+    
+    return periods, comparison
+
+def load_score_history():
+    """Monthly rolling score series, grouped by suburb"""
+    history_file = find_artifact('suburb_score_history.csv')
+    if not history_file:
+        return {}
+    
+    return group_records(read_records(history_file), 'suburb')
+
+def load_component_weights():
+    """Default component weights exported by the pipeline, or None without the file"""
+    weights_file = find_artifact(COMPONENT_WEIGHTS_FILENAME)
+    if not weights_file:
+        return None
+    
+    with open(weights_file) as f:
+        return json.load(f)
+
+def period_stats(rows):
+    """Summary of one period's rows (exported highest score first)"""
+    scores = [row['total_score'] for row in rows]
+    
+    def mean(column):
+        return float(sum(row[column] for row in rows) / len(rows)) if rows else 0.0
+    
+    return {
+        'total_suburbs': len(rows),
+        'avg_score': mean('total_score'),
+        'top_suburb': rows[0]['suburb'] if rows else None,
+        'top_score': float(rows[0]['total_score']) if rows else 0,
+        'avg_growth': mean('price_growth_pct'),
+        'avg_price': mean('period_median_price'),
+        'total_transactions': int(sum(row['period_transactions'] for row in rows)),
+        'buy_signals': sum(score >= 60 for score in scores),
+        'hold_signals': sum(45 <= score < 60 for score in scores),
+        'caution_signals': sum(score < 45 for score in scores)
+    }
+
+def prepare_responses(records, comparison):
+    """Serialized bodies for the static endpoints, built once per data load"""
+    responses = {}
+    
+    for period_id, data in records.items():
+        responses[f'data/{period_id}'] = PreparedResponse.json({
+            'success': True,
+            'period': PERIOD_NAMES.get(period_id, period_id),
+            'data': data,
+            'total': len(data)
+        }, app.json)
+        responses[f'stats/{period_id}'] = PreparedResponse.json({
+            'success': True,
+            'period': PERIOD_NAMES.get(period_id, period_id),
+            'stats': period_stats(data)
+        }, app.json)
+    
+    if comparison:
+        responses['comparison'] = PreparedResponse.json({
+            'success': True,
+            'data': comparison,
+            'total': len(comparison)
+        }, app.json)
+    
+    responses['top-performers'] = PreparedResponse.json({
+        'success': True,
+        'data': {
+            PERIOD_NAMES.get(period_id, period_id): data[:5]
+            for period_id, data in records.items()
+        }
+    }, app.json)
+    
+    return responses
+
+class DashboardData:
+    """One consistent load of the score artifacts with everything derived from it"""
+    
+    def __init__(self, records, comparison, history, signature=None, component_weights=None):
+        self.records = records
+        self.comparison = comparison
+        self.history = history
+        self.signature = signature
+        self.component_weights = component_weights
+        
+        # suburb -> row per period (first row wins, as the old scan's iloc[0] did)
+        self.suburb_index = {}
+        for period_id, rows in self.records.items():
+            index = {}
+            for row in rows:
+                index.setdefault(row['suburb'], row)
+            self.suburb_index[period_id] = index
+        
+        self.responses = prepare_responses(records, comparison)
+        self._component_matrices = {}
+    
+    def component_matrix(self, period_id):
+        """Component matrix for custom-weight re-scoring, built on first use (None if no such period)"""
+        if period_id not in self.records:
+            return None
+        if period_id not in self._component_matrices:
+            from rescoring import ComponentMatrix
+            self._component_matrices[period_id] = ComponentMatrix(self.records[period_id], self.component_weights)
+        return self._component_matrices[period_id]
+    
+    @classmethod
+    def load(cls):
+        """Read and index every artifact (raises if a file cannot be read)"""
+        signature = artifact_signature(WATCHED_ARTIFACTS)
+        records, comparison = load_all_period_data()
+        return cls(records, comparison, load_score_history(), signature, load_component_weights())
+
+# Loaded on first use, so a cold start serves `/` and static files without touching the data
+_dashboard_data = None
+
+def swap_dashboard_data(snapshot):
+    """Publish a new snapshot; in-flight requests finish on the one they read"""
+    global _dashboard_data
+    _dashboard_data = snapshot
+
+def get_dashboard_data():
+    """Current data snapshot, loading it (and starting the reload watcher) on first call"""
+    if _dashboard_data is None:
+        try:
+            snapshot = DashboardData.load()
+        except Exception as e:
+            print(f"Error loading data: {e}")
+            snapshot = DashboardData({}, [], {})
+        swap_dashboard_data(snapshot)
+        
+        if RELOAD_INTERVAL > 0:
+            ArtifactWatcher(
+                WATCHED_ARTIFACTS, DashboardData.load, swap_dashboard_data,
+                signature=snapshot.signature, interval=RELOAD_INTERVAL
+            ).start()
+    return _dashboard_data
+
+# Geocoded transactions for map views (built lazily on first map request)
+_point_index = None
+
+def get_point_index():
+    """Grid index over geocoded transactions from the enrichment artifact"""
+    global _point_index
+    if _point_index is None:
+        import pandas as pd
+        from map_index import PointGridIndex
+        base_dir = Path(__file__).parent
+        columns = ['suburb', 'sale_date', 'price', 'latitude', 'longitude']
+        for parquet_file in [base_dir / 'transactions_enriched.parquet',
+                             base_dir.parent / 'transactions_enriched.parquet']:
+            if parquet_file.exists():
+                points = pd.read_parquet(parquet_file, columns=columns)
+                break
+        else:
+            points = pd.DataFrame(columns=columns)
+        _point_index = PointGridIndex(
+            points['longitude'], points['latitude'], points['price'],
+            points['suburb'], points['sale_date']
+        )
+        # Precompute the tiles a city-level map opens on
+        _point_index.warm(zooms=range(10, 14))
+    return _point_index
+
+# Sorted transactions for custom-window scoring (loaded lazily on first request)
+_live_scorer = None
+
+def get_live_scorer():
+    """In-memory scoring store over the enriched transactions, rebuilt when its source files change"""
+    global _live_scorer
+    if _live_scorer is None or not _live_scorer.is_current():
+        from live_scoring import LiveScorer
+        _live_scorer = LiveScorer()
+        # Cached responses belong to the previous scorer
+        live_score_response.cache_clear()
+    return _live_scorer
+
+@lru_cache(maxsize=LIVE_CACHE_SIZE)
+def live_score_response(scorer, start, end, suburbs):
+    """Prepared response for one normalized (start, end, suburbs) query against `scorer`"""
+    scores, missing = scorer.score(start, end, suburbs)
+    data = scores.to_dict('records')
+    return PreparedResponse.json({
+        'success': True,
+        'start': start,
+        'end': end,
+        'data': data,
+        'total': len(data),
+        'not_found': missing
+    }, app.json)
+
 @app.route('/')
 def index():
     """Main dashboard page"""
@@ -74,72 +299,46 @@ def get_periods():
 @app.route('/api/data/<period_id>')
 def get_period_data(period_id):
     """Get data for specific period"""
-    if period_id not in periods_data:
+    snapshot = get_dashboard_data()
+    if period_id not in snapshot.records:
         return jsonify({'success': False, 'error': 'Period not found'}), 404
     
-    period_df = periods_data[period_id]
-    data = period_df.to_dict('records')
-    
-    return jsonify({
-        'success': True,
-        'period': PERIOD_NAMES.get(period_id, period_id),
-        'data': data,
-        'total': len(data)
-    })
+    return snapshot.responses[f'data/{period_id}'].serve(request)
 
 @app.route('/api/comparison')
 def get_comparison():
     """Get multi-period comparison data"""
-    if comparison_data.empty:
+    snapshot = get_dashboard_data()
+    if not snapshot.comparison:
         return jsonify({'success': False, 'error': 'No comparison data'}), 404
     
-    data = comparison_data.to_dict('records')
-    
-    return jsonify({
-        'success': True,
-        'data': data,
-        'total': len(data)
-    })
+    return snapshot.responses['comparison'].serve(request)
 
 @app.route('/api/stats/<period_id>')
 def get_period_stats(period_id):
     """Get statistics for a specific period"""
-    if period_id not in periods_data:
+    snapshot = get_dashboard_data()
+    if period_id not in snapshot.records:
         return jsonify({'success': False, 'error': 'Period not found'}), 404
     
-    period_df = periods_data[period_id]
-    
-    return jsonify({
-        'success': True,
-        'period': PERIOD_NAMES.get(period_id, period_id),
-        'stats': {
-            'total_suburbs': len(period_df),
-            'avg_score': float(period_df['total_score'].mean()),
-            'top_suburb': period_df.iloc[0]['suburb'] if len(period_df) > 0 else None,
-            'top_score': float(period_df.iloc[0]['total_score']) if len(period_df) > 0 else 0,
-            'avg_growth': float(period_df['price_growth_pct'].mean()),
-            'avg_price': float(period_df['period_median_price'].mean()),
-            'total_transactions': int(period_df['period_transactions'].sum()),
-            'buy_signals': len(period_df[period_df['total_score'] >= 60]),
-            'hold_signals': len(period_df[(period_df['total_score'] >= 45) & (period_df['total_score'] < 60)]),
-            'caution_signals': len(period_df[period_df['total_score'] < 45])
-        }
-    })
+    return snapshot.responses[f'stats/{period_id}'].serve(request)
 
 @app.route('/api/suburb/<suburb_name>')
 def get_suburb_across_periods(suburb_name):
     """Get suburb data across all periods"""
     suburb_upper = suburb_name.upper()
+    snapshot = get_dashboard_data()
     
     result = {
         'suburb': suburb_upper,
-        'periods': {}
+        'periods': {},
+        'trend': snapshot.history.get(suburb_upper, [])
     }
     
-    for period_id, period_df in periods_data.items():
-        suburb_data = period_df[period_df['suburb'] == suburb_upper]
-        if len(suburb_data) > 0:
-            result['periods'][PERIOD_NAMES.get(period_id, period_id)] = suburb_data.iloc[0].to_dict()
+    for period_id, index in snapshot.suburb_index.items():
+        row = index.get(suburb_upper)
+        if row is not None:
+            result['periods'][PERIOD_NAMES.get(period_id, period_id)] = row
     
     if not result['periods']:
         return jsonify({'success': False, 'error': 'Suburb not found'}), 404
@@ -152,15 +351,78 @@ def get_suburb_across_periods(suburb_name):
 @app.route('/api/top-performers')
 def get_top_performers():
     """Get top 5 performers from each period"""
-    result = {}
+    return get_dashboard_data().responses['top-performers'].serve(request)
+
+@app.route('/api/rescore/<period_id>')
+def rescore_period(period_id):
+    """Re-rank a period's suburbs under custom component weights"""
+    dashboard_data = get_dashboard_data()
+    if dashboard_data.component_weights is None:
+        return jsonify({'success': False, 'error': f'{COMPONENT_WEIGHTS_FILENAME} not found; run the pipeline first'}), 503
+    matrix = dashboard_data.component_matrix(period_id)
+    if matrix is None:
+        return jsonify({'success': False, 'error': 'Period not found'}), 404
     
-    for period_id, period_df in periods_data.items():
-        top_5 = period_df.head(5)
-        result[PERIOD_NAMES.get(period_id, period_id)] = top_5.to_dict('records')
+    from rescoring import parse_weights
+    try:
+        weights = parse_weights(request.args, dashboard_data.component_weights)
+        limit = int(request.args.get('limit', 0))
+        if limit < 0:
+            raise ValueError('limit must not be negative')
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    data = matrix.rescore(weights, limit=limit)
     
     return jsonify({
         'success': True,
-        'data': result
+        'period': PERIOD_NAMES.get(period_id, period_id),
+        'weights': {column: round(weight, 2) for column, weight in weights.items()},
+        'data': data,
+        'total': len(data)
+    })
+
+@app.route('/api/score')
+def score_custom_window():
+    """Score suburbs live over a custom date window"""
+    try:
+        scorer = get_live_scorer()
+    except RuntimeError as e:
+        return jsonify({'success': False, 'error': str(e)}), 503
+    
+    from live_scoring import normalize_query
+    try:
+        query = normalize_query(request.args, scorer.latest_date)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    return live_score_response(scorer, *query).serve(request)
+
+@app.route('/api/points')
+def get_map_points():
+    """Get transactions inside a map view: raw points at high zoom, clusters below"""
+    try:
+        west, south, east, north = [float(v) for v in request.args.get('bbox', '').split(',')]
+        zoom = int(request.args.get('zoom', 12))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Expected bbox=west,south,east,north and integer zoom'}), 400
+    
+    from map_index import MAX_ZOOM
+    if not 0 <= zoom <= MAX_ZOOM:
+        return jsonify({'success': False, 'error': f'zoom must be between 0 and {MAX_ZOOM}'}), 400
+    
+    point_index = get_point_index()
+    if len(point_index) == 0:
+        return jsonify({'success': False, 'error': 'No geocoded transactions'}), 404
+    
+    zoom, mode, features = point_index.query_view(west, south, east, north, zoom)
+    
+    return jsonify({
+        'success': True,
+        'zoom': zoom,
+        'mode': mode,
+        'data': features,
+        'total': len(features)
     })
 
 if __name__ == '__main__':
@@ -0,0 +1,111 @@
+"""
+Dashboard API Latency Benchmark
+Per-request serialization vs prepared (gzip + ETag) responses
+
+Times the static endpoints through the Flask test client three ways: the old
+to_dict + jsonify path, a prepared response fetched fresh (gzip accepted),
+and a revalidation that ends in 304. Reports median and p95 latency and the
+bytes on the wire.
+
+Usage: python3 benchmark_api.py [requests per endpoint]
+"""
+
+import sys
+import time
+import numpy as np
+import pandas as pd
+from flask import jsonify
+from app import app, find_artifact, get_live_scorer, live_score_response, PERIOD_IDS, PERIOD_NAMES
+
+N_REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+# DataFrames as the app used to hold them, for the per-request baseline
+periods_data = {
+    period_id: pd.read_csv(csv_file).fillna(0).round(2)
+    for period_id in PERIOD_IDS
+    if (csv_file := find_artifact(f'investment_scores_{period_id}.csv'))
+}
+comparison_file = find_artifact('multi_period_comparison.csv')
+comparison_data = pd.read_csv(comparison_file).fillna(0) if comparison_file else pd.DataFrame()
+
+
+def legacy_body(path):
+    """The payload exactly as the routes built it before responses were prepared"""
+    if path == '/api/comparison':
+        data = comparison_data.to_dict('records')
+        return {'success': True, 'data': data, 'total': len(data)}
+    if path == '/api/top-performers':
+        return {'success': True, 'data': {
+            PERIOD_NAMES.get(period_id, period_id): period_df.head(5).to_dict('records')
+            for period_id, period_df in periods_data.items()
+        }}
+    period_id = path.rsplit('/', 1)[1]
+    data = periods_data[period_id].to_dict('records')
+    return {'success': True, 'period': PERIOD_NAMES.get(period_id, period_id), 'data': data, 'total': len(data)}
+
+
+def timed(fn):
+    """(median ms, p95 ms, bytes of the last response) over N_REQUESTS calls"""
+    times = []
+    for _ in range(N_REQUESTS):
+        start = time.perf_counter()
+        size = fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return float(np.median(times)), float(np.percentile(times, 95)), size
+
+
+print("="*80)
+print("⏱️  DASHBOARD API LATENCY BENCHMARK")
+print(f"   {N_REQUESTS} requests per endpoint and mode")
+print("="*80)
+
+client = app.test_client()
+paths = [f'/api/data/{period_id}' for period_id in periods_data] + ['/api/top-performers']
+if not comparison_data.empty:
+    paths.append('/api/comparison')
+
+rows = []
+for path in paths:
+    def legacy():
+        with app.test_request_context(path):
+            return len(jsonify(legacy_body(path)).get_data())
+
+    def fresh():
+        return len(client.get(path, headers={'Accept-Encoding': 'gzip'}).get_data())
+
+    etag = client.get(path, headers={'Accept-Encoding': 'gzip'}).headers['ETag']
+
+    def revalidate():
+        response = client.get(path, headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+        assert response.status_code == 304
+        return len(response.get_data())
+
+    for mode, fn in [('per-request jsonify', legacy), ('prepared 200 gzip', fresh), ('prepared 304', revalidate)]:
+        median_ms, p95_ms, size = timed(fn)
+        rows.append({'endpoint': path, 'mode': mode, 'median_ms': median_ms, 'p95_ms': p95_ms, 'bytes': size})
+
+# Indexed suburb lookup across all periods
+if periods_data:
+    suburb = next(iter(periods_data.values()))['suburb'].iloc[0]
+    median_ms, p95_ms, size = timed(lambda: len(client.get(f'/api/suburb/{suburb}').get_data()))
+    rows.append({'endpoint': f'/api/suburb/{suburb}', 'mode': 'indexed lookup', 'median_ms': median_ms,
+                 'p95_ms': p95_ms, 'bytes': size})
+
+# Custom-window scoring: fresh computation (LRU cleared) vs a cached query
+try:
+    scorer = get_live_scorer()
+except RuntimeError as e:
+    print(f"Skipping /api/score: {e}")
+else:
+    path = f"/api/score?start={(scorer.latest_date - pd.DateOffset(months=18)).date()}"
+
+    def uncached():
+        live_score_response.cache_clear()
+        return len(client.get(path).get_data())
+
+    for mode, fn in [('live, uncached', uncached), ('live, LRU hit', lambda: len(client.get(path).get_data()))]:
+        median_ms, p95_ms, size = timed(fn)
+        rows.append({'endpoint': path, 'mode': mode, 'median_ms': median_ms, 'p95_ms': p95_ms, 'bytes': size})
+
+print("\n" + pd.DataFrame(rows).to_string(index=False, float_format='%.3f'))
+print("\nNote: 'per-request jsonify' times serialization only (no routing); the prepared modes include the full request.")
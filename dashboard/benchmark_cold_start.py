@@ -0,0 +1,90 @@
+"""
+Dashboard Cold-Start Benchmark
+Import time, first load and resident memory per worker, in fresh interpreters
+
+Each trial starts a new Python process (a serverless cold start), imports
+the app, then times the first data load and the first /api/data response,
+and records peak RSS and whether pandas ended up imported. The score source
+is forced with DASHBOARD_SCORE_SOURCE so both paths read the same exports.
+A reference row replays the previous pandas loader (import pandas, read_csv
++ fillna + round of every export) for comparison.
+
+Usage: python3 benchmark_cold_start.py [trials per source]
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+import pandas as pd
+
+TRIALS = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+DASHBOARD_DIR = Path(__file__).resolve().parent
+
+CHILD = """
+import json, resource, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.get_dashboard_data()
+loaded = time.perf_counter()
+response = app.app.test_client().get('/api/data/1_year')
+served = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'load_ms': (loaded - imported) * 1000,
+    'first_response_ms': (served - loaded) * 1000,
+    'total_ms': (served - start) * 1000,
+    'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'pandas_imported': 'pandas' in sys.modules,
+    'status': response.status_code
+}))
+"""
+
+PANDAS_CHILD = """
+import json, resource, sys, time
+start = time.perf_counter()
+import flask
+import pandas as pd
+imported = time.perf_counter()
+from pathlib import Path
+frames = [pd.read_csv(path).fillna(0).round(2) for path in sorted(Path('.').glob('investment_scores_*.csv'))]
+comparison = [pd.read_csv(path).fillna(0) for path in Path('.').glob('multi_period_comparison.csv')]
+loaded = time.perf_counter()
+body = json.dumps(frames[0].to_dict('records')) if frames else ''
+served = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'load_ms': (loaded - imported) * 1000,
+    'first_response_ms': (served - loaded) * 1000,
+    'total_ms': (served - start) * 1000,
+    'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'pandas_imported': True,
+    'status': 200
+}))
+"""
+
+print("="*80)
+print("⏱️  DASHBOARD COLD-START BENCHMARK")
+print(f"   {TRIALS} fresh processes per score source")
+print("="*80)
+
+rows = []
+for source, child in [('pandas loader (before)', PANDAS_CHILD), ('csv', CHILD), ('snapshot', CHILD)]:
+    env = dict(os.environ, DASHBOARD_SCORE_SOURCE='csv' if child is PANDAS_CHILD else source)
+    trials = []
+    for _ in range(TRIALS):
+        output = subprocess.run(
+            [sys.executable, '-c', child], cwd=DASHBOARD_DIR, env=env,
+            capture_output=True, text=True, check=True
+        ).stdout
+        trials.append(json.loads(output.strip().splitlines()[-1]))
+    timings = pd.DataFrame(trials)
+    rows.append({'source': source, **timings.drop(columns=['status', 'pandas_imported']).median().to_dict(),
+                 'pandas_imported': bool(timings['pandas_imported'].any()),
+                 'status': int(timings['status'].iloc[0])})
+
+print("\n" + pd.DataFrame(rows).to_string(index=False, float_format='%.1f'))
+print("\nMedians over trials. A snapshot row only differs from csv once "
+      "scores_snapshot.arrow and comparison_snapshot.arrow exist (run the pipeline).")
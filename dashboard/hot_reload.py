@@ -0,0 +1,76 @@
+"""
+Artifact Hot Reload
+Polls the score artifacts and swaps in a freshly loaded snapshot
+
+A daemon thread stats the watched files every `interval` seconds. When their
+(mtime, size) signature changes and then holds for one more poll, so a CSV
+still being written is never read half-way, `load` builds a complete new
+snapshot off the request path and `swap` publishes it with a single reference
+assignment. Requests keep whichever snapshot they started with, and a load
+that fails leaves the current snapshot serving.
+
+Enable with DASHBOARD_RELOAD_SECONDS=<seconds>.
+"""
+
+import os
+import threading
+import time
+
+DEFAULT_INTERVAL = float(os.environ.get('DASHBOARD_RELOAD_SECONDS', 0))
+
+
+def artifact_signature(paths):
+    """(path, mtime_ns, size) per path, None fields for missing files"""
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((str(path), stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append((str(path), None, None))
+    return tuple(signature)
+
+
+class ArtifactWatcher:
+    """Reloads when the watched files change and have settled for one poll"""
+
+    def __init__(self, paths, load, swap, signature=None, interval=DEFAULT_INTERVAL):
+        self.paths = list(paths)
+        self.load = load
+        self.swap = swap
+        self.signature = signature if signature is not None else artifact_signature(self.paths)
+        self.interval = interval
+        self._pending = None
+
+    def poll(self):
+        """One check; True when a new snapshot was swapped in"""
+        signature = artifact_signature(self.paths)
+        if signature == self.signature:
+            self._pending = None
+            return False
+        if signature != self._pending:
+            # Changed since the last poll: wait until the writer has finished
+            self._pending = signature
+            return False
+
+        self._pending = None
+        self.signature = signature
+        try:
+            snapshot = self.load()
+        except Exception as e:
+            print(f"Reload failed, keeping current data: {e}")
+            return False
+        self.swap(snapshot)
+        print(f"Reloaded score artifacts ({sum(mtime is not None for _, mtime, _ in signature)} files)")
+        return True
+
+    def start(self):
+        """Poll forever on a daemon thread"""
+        thread = threading.Thread(target=self._run, name='artifact-watcher', daemon=True)
+        thread.start()
+        return thread
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.poll()
@@ -0,0 +1,138 @@
+"""
+Live Window Scoring
+Scores arbitrary date windows from an in-memory, date-sorted transactions store
+
+The enriched transactions (with cached road distances) are loaded once into
+the pipeline's `period_windows.SortedTransactions`. A custom window is then
+one vectorized boundary search, slice medians for the requested suburbs and
+`scoring.score_metrics`, the same code that produces the precomputed periods.
+As in the pipeline, the comparison window is the equal-length span before
+`start` and affordability is measured against the all-time 95th percentile
+price.
+
+Road distances follow the pipeline's accessibility mode, set here with
+DASHBOARD_ACCESSIBILITY_MODE to match ACCESSIBILITY_MODE in the scoring
+scripts: 'euclidean' reads the distance cache for the current `roads.gpkg`
+and major-road classes (`distance_cache.roads_layer_key`), 'network' computes
+shortest-path distances from the cached road graph (`road_network`).
+
+A scorer records the (mtime, size) of the files it was built from (the
+enriched artifact, `roads.gpkg` and, in euclidean mode, the distance cache
+file for that layer); `is_current` tells the app when to rebuild it.
+
+The scoring modules live in the project root, which is not part of the
+Vercel bundle; without them, or without the enriched artifact, live scoring
+reports itself unavailable.
+"""
+
+import os
+import sys
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from hot_reload import artifact_signature
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
+
+try:
+    from data_access import read_enriched
+    from distance_cache import ADDRESS_KEY, CACHE_DIR, cache_path, roads_layer_key
+    from incremental_ingest import DISTANCE_SINCE
+    from period_windows import SortedTransactions, multi_period_metrics
+    from road_proximity import MAJOR_ROAD_CLASSES
+    from scoring import score_metrics
+    LIVE_SCORING_AVAILABLE = True
+except ImportError:
+    LIVE_SCORING_AVAILABLE = False
+
+ENRICHED_PATH = PROJECT_DIR / 'transactions_enriched.parquet'
+ROADS_PATH = PROJECT_DIR / 'roads.gpkg'
+# 'euclidean' or 'network', as ACCESSIBILITY_MODE in the scoring scripts
+ACCESSIBILITY_MODE = os.environ.get('DASHBOARD_ACCESSIBILITY_MODE', 'euclidean')
+LIVE_COLUMNS = ['suburb', 'sale_date', 'price']
+
+
+def normalize_query(args, latest_date):
+    """
+    (start, end, suburbs) cache key from request args
+
+    Dates are truncated to days, `end` defaults to the latest sale and
+    suburbs are upper-cased, de-duplicated and sorted (empty = all suburbs).
+    Raises ValueError for a missing or unparseable start, or start after end.
+    """
+    if not args.get('start'):
+        raise ValueError('Expected start=YYYY-MM-DD')
+    try:
+        start = pd.Timestamp(args['start']).normalize()
+        end = pd.Timestamp(args['end']).normalize() if args.get('end') else latest_date.normalize()
+    except ValueError:
+        raise ValueError('Dates must be YYYY-MM-DD')
+    if start > end:
+        raise ValueError('start must not be after end')
+
+    suburbs = tuple(sorted({s.strip().upper() for s in args.get('suburbs', '').split(',') if s.strip()}))
+    return start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d'), suburbs
+
+
+class LiveScorer:
+    """Sorted transactions plus the market price scale, ready for window queries"""
+
+    distance_path = None
+
+    def __init__(self, enriched_path=ENRICHED_PATH, roads_path=ROADS_PATH, accessibility_mode=ACCESSIBILITY_MODE):
+        if not LIVE_SCORING_AVAILABLE:
+            raise RuntimeError('Scoring modules are not available in this deployment')
+        if not Path(enriched_path).exists():
+            raise RuntimeError(f'{Path(enriched_path).name} not found; run the pipeline first')
+        if accessibility_mode not in ('euclidean', 'network'):
+            raise RuntimeError(f"Unknown accessibility mode '{accessibility_mode}' (expected euclidean or network)")
+
+        has_roads = Path(roads_path).exists()
+        if has_roads and accessibility_mode == 'euclidean':
+            self.distance_path = cache_path(roads_layer_key(str(roads_path), MAJOR_ROAD_CLASSES),
+                                            PROJECT_DIR / CACHE_DIR)
+        # Stat before reading, so a file replaced mid-load shows up as a change
+        self.sources = [p for p in (enriched_path, roads_path, self.distance_path) if p is not None]
+        self.signature = artifact_signature(self.sources)
+
+        df = read_enriched(str(enriched_path), ADDRESS_KEY + LIVE_COLUMNS)
+        distances = self._road_distances(df, roads_path, accessibility_mode) if has_roads else None
+        if distances is not None:
+            df = df.merge(distances, on=ADDRESS_KEY, how='left')
+
+        self.store = SortedTransactions(df)
+        self.max_price = float(np.nanquantile(self.store.values['price'], 0.95))
+        self.latest_date = pd.Timestamp(int(self.store.seconds.max()), unit='s')
+        self.suburb_rows = {suburb: i for i, suburb in enumerate(self.store.suburbs)}
+
+    def _road_distances(self, df, roads_path, accessibility_mode):
+        """Per-address distances for the current road layer as the pipeline computed them, or None"""
+        if accessibility_mode == 'network':
+            from road_network import network_road_distances
+            geocoded = df[df['latitude'].notna() & (df['sale_date'] >= DISTANCE_SINCE)]
+            return network_road_distances(geocoded, str(roads_path), cache_dir=PROJECT_DIR / CACHE_DIR)
+
+        # No cache for this road layer yet: accessibility scores fall back to neutral
+        return pd.read_parquet(self.distance_path) if self.distance_path.exists() else None
+
+    def is_current(self):
+        """False once any source file has changed, appeared or disappeared since the scorer was built"""
+        return artifact_signature(self.sources) == self.signature
+
+    def score(self, start, end, suburbs=()):
+        """Scores for [start, end] (highest first) and the requested suburbs not in the data"""
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        missing = [suburb for suburb in suburbs if suburb not in self.suburb_rows]
+        rows = None
+        if suburbs:
+            rows = np.array([self.suburb_rows[suburb] for suburb in suburbs if suburb in self.suburb_rows], dtype=int)
+
+        # Sale dates are whole days, so an `end` at midnight still includes that day
+        windows = {'custom': (start, start - (end - start))}
+        metrics = multi_period_metrics(self.store, windows, end, rows)['custom']
+
+        scores = score_metrics(metrics, self.max_price)
+        scores = scores.sort_values('total_score', ascending=False).fillna(0).round(2)
+        return scores, missing
@@ -0,0 +1,205 @@
+"""
+Map Point Index
+In-memory grid index over geocoded transactions for bounding-box map queries
+
+Points are bucketed into a fixed lon/lat grid and stored sorted by cell, so a
+bbox query only touches the contiguous runs of cells it overlaps. Map views
+are answered per XYZ web-mercator tile: low zooms return server-side
+clusters (count, median price, centroid, member bbox), high zooms return raw
+points, and each tile's result is memoised so panning over hot tiles is a
+cache hit. A view spanning more than MAX_TILES_PER_QUERY tiles is served from
+the deepest coarser zoom that fits rather than rejected.
+"""
+
+import math
+from functools import lru_cache
+import numpy as np
+
+GRID_CELL_DEG = 0.01       # ~1 km grid cells
+CLUSTER_GRID = 4           # clusters per tile side (4 x 4 per tile)
+POINTS_MIN_ZOOM = 15       # raw points from this zoom level up
+MAX_ZOOM = 22              # deepest web-map zoom level served
+MAX_TILES_PER_QUERY = 64
+TILE_CACHE_SIZE = 4096
+
+
+def tile_bounds(z, x, y):
+    """(west, south, east, north) of an XYZ tile in degrees"""
+    n = 2 ** z
+
+    def lat(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return x / n * 360 - 180, lat(y + 1), (x + 1) / n * 360 - 180, lat(y)
+
+
+def tile_ranges(west, south, east, north, z):
+    """Column and row ranges of the XYZ tiles covering a bbox at zoom z"""
+    if not 0 <= z <= MAX_ZOOM:
+        raise ValueError(f'zoom must be between 0 and {MAX_ZOOM}')
+    n = 2 ** z
+
+    def tile_x(lon):
+        return min(n - 1, max(0, int((lon + 180) / 360 * n)))
+
+    def tile_y(lat):
+        lat = max(-85.0511, min(85.0511, lat))
+        rad = math.radians(lat)
+        return min(n - 1, max(0, int((1 - math.asinh(math.tan(rad)) / math.pi) / 2 * n)))
+
+    return range(tile_x(west), tile_x(east) + 1), range(tile_y(north), tile_y(south) + 1)
+
+
+def tiles_for_bbox(west, south, east, north, z, max_tiles=None):
+    """
+    XYZ tiles covering a bbox at zoom z
+
+    Raises ValueError for a zoom outside 0..MAX_ZOOM, or when the bbox spans
+    more than `max_tiles` tiles (checked before any tile is listed).
+    """
+    xs, ys = tile_ranges(west, south, east, north, z)
+    if max_tiles is not None and len(xs) * len(ys) > max_tiles:
+        raise ValueError(f'View spans {len(xs) * len(ys)} tiles; zoom in (max {max_tiles})')
+    return [(z, x, y) for x in xs for y in ys]
+
+
+def fit_zoom(west, south, east, north, z, max_tiles=MAX_TILES_PER_QUERY):
+    """Deepest zoom at or below z whose tiles covering the bbox number at most max_tiles"""
+    while z > 0:
+        xs, ys = tile_ranges(west, south, east, north, z)
+        if len(xs) * len(ys) <= max_tiles:
+            break
+        z -= 1
+    return z
+
+
+class PointGridIndex:
+    """Grid-bucketed point store answering bbox queries and per-tile clusters"""
+
+    def __init__(self, longitude, latitude, price, suburb, sale_date, cell_deg=GRID_CELL_DEG):
+        longitude = np.asarray(longitude, dtype=float)
+        latitude = np.asarray(latitude, dtype=float)
+        keep = ~(np.isnan(longitude) | np.isnan(latitude))
+
+        self.cell_deg = cell_deg
+        self.lon0 = float(longitude[keep].min()) if keep.any() else 0.0
+        self.lat0 = float(latitude[keep].min()) if keep.any() else 0.0
+        cols = np.floor((longitude[keep] - self.lon0) / cell_deg).astype('int64')
+        rows = np.floor((latitude[keep] - self.lat0) / cell_deg).astype('int64')
+        self.n_cols = int(cols.max()) + 1 if keep.any() else 1
+        self.n_rows = int(rows.max()) + 1 if keep.any() else 1
+
+        cell = rows * self.n_cols + cols
+        order = np.argsort(cell, kind='stable')
+        self.cell = cell[order]
+        self.lon = longitude[keep][order]
+        self.lat = latitude[keep][order]
+        self.price = np.asarray(price, dtype=float)[keep][order]
+        self.suburb = np.asarray(suburb, dtype=object)[keep][order]
+        self.sale_date = np.asarray(sale_date, dtype=object)[keep][order]
+
+        self.tile = lru_cache(maxsize=TILE_CACHE_SIZE)(self._tile)
+
+    def __len__(self):
+        return len(self.lon)
+
+    def query(self, west, south, east, north):
+        """Indices of points inside a bbox"""
+        if len(self) == 0:
+            return np.empty(0, dtype='int64')
+        c0 = max(0, int(math.floor((west - self.lon0) / self.cell_deg)))
+        c1 = min(self.n_cols - 1, int(math.floor((east - self.lon0) / self.cell_deg)))
+        r0 = max(0, int(math.floor((south - self.lat0) / self.cell_deg)))
+        r1 = min(self.n_rows - 1, int(math.floor((north - self.lat0) / self.cell_deg)))
+        if c0 > c1 or r0 > r1:
+            return np.empty(0, dtype='int64')
+
+        # Each grid row overlapping the bbox is one contiguous run in sorted order
+        row_starts = np.arange(r0, r1 + 1) * self.n_cols
+        starts = np.searchsorted(self.cell, row_starts + c0, side='left')
+        ends = np.searchsorted(self.cell, row_starts + c1, side='right')
+        candidates = np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)])
+
+        inside = ((self.lon[candidates] >= west) & (self.lon[candidates] <= east) &
+                  (self.lat[candidates] >= south) & (self.lat[candidates] <= north))
+        return candidates[inside]
+
+    def points(self, idx):
+        return [
+            {
+                'lat': float(self.lat[i]),
+                'lon': float(self.lon[i]),
+                'price': float(self.price[i]),
+                'suburb': self.suburb[i],
+                'sale_date': str(self.sale_date[i])[:10]
+            }
+            for i in idx
+        ]
+
+    def _tile(self, z, x, y):
+        """Raw points (high zoom) or clusters (low zoom) for one tile"""
+        west, south, east, north = tile_bounds(z, x, y)
+        idx = self.query(west, south, east, north)
+        if z >= POINTS_MIN_ZOOM or len(idx) == 0:
+            return self.points(idx)
+
+        # Bucket the tile into CLUSTER_GRID x CLUSTER_GRID cells
+        col = np.minimum(((self.lon[idx] - west) / (east - west) * CLUSTER_GRID).astype(int), CLUSTER_GRID - 1)
+        row = np.minimum(((north - self.lat[idx]) / (north - south) * CLUSTER_GRID).astype(int), CLUSTER_GRID - 1)
+        bucket = row * CLUSTER_GRID + col
+        order = np.argsort(bucket, kind='stable')
+        bucket, idx = bucket[order], idx[order]
+        bounds = np.flatnonzero(np.diff(bucket)) + 1
+
+        clusters = []
+        for members in np.split(idx, bounds):
+            lon, lat = self.lon[members], self.lat[members]
+            clusters.append({
+                'lat': float(lat.mean()),
+                'lon': float(lon.mean()),
+                'count': int(len(members)),
+                'median_price': float(np.median(self.price[members])),
+                'bbox': [float(lon.min()), float(lat.min()), float(lon.max()), float(lat.max())]
+            })
+        return clusters
+
+    def query_view(self, west, south, east, north, zoom):
+        """
+        Points or clusters for a map view, assembled from cached tiles
+
+        Views spanning more than MAX_TILES_PER_QUERY tiles at the requested
+        zoom are served at the deepest coarser zoom that fits; the zoom
+        actually used is returned with the mode and features. Points are kept
+        when they fall inside the view, clusters when their member bbox
+        overlaps it, so a cluster straddling the view edge is not dropped
+        because its centroid lies outside.
+        """
+        zoom = fit_zoom(west, south, east, north, zoom)
+        tiles = tiles_for_bbox(west, south, east, north, zoom)
+
+        features = []
+        if zoom >= POINTS_MIN_ZOOM:
+            for tile in tiles:
+                features.extend(
+                    f for f in self.tile(*tile)
+                    if west <= f['lon'] <= east and south <= f['lat'] <= north
+                )
+            return zoom, 'points', features
+
+        for tile in tiles:
+            features.extend(
+                f for f in self.tile(*tile)
+                if f['bbox'][0] <= east and f['bbox'][2] >= west and
+                f['bbox'][1] <= north and f['bbox'][3] >= south
+            )
+        return zoom, 'clusters', features
+
+    def warm(self, zooms, bbox=None):
+        """Precompute tiles covering the data (or a bbox) at the given zoom levels"""
+        if bbox is None:
+            if len(self) == 0:
+                return
+            bbox = (self.lon.min(), self.lat.min(), self.lon.max(), self.lat.max())
+        for zoom in zooms:
+            for tile in tiles_for_bbox(*bbox, zoom)[:MAX_TILES_PER_QUERY]:
+                self.tile(*tile)
@@ -0,0 +1,117 @@
+"""
+Score Records
+Standard-library loading of the score exports as lists of row dicts
+
+Reads the pipeline CSVs with the `csv` module and types each column the way
+`pd.read_csv(...).fillna(0).round(decimals)` does. A column of integers
+with no blanks stays int. Any other numeric column becomes float, with
+blanks set to 0.0, and is rounded. Everything else stays text, with blanks
+set to 0. The serving path keeps these records and precomputed summaries,
+so pandas is never imported to answer a request.
+
+Both steps follow pandas to the bit. Numbers are parsed with the algorithm
+of pandas' default C converter (`parse_float`), which can land one ulp away
+from Python's correctly rounded `float()`. Rounding is numpy's: scale,
+round half to even, unscale (`round_float`), which differs from Python's
+`round(value, 2)` on values such as 11.475.
+"""
+
+import csv
+import math
+import re
+
+# pandas' default NA strings
+NA_VALUES = {
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+}
+# pandas' float converter keeps this many significant digits
+MAX_DIGITS = 17
+POWERS_OF_TEN = [float(f'1e{i}') for i in range(309)]
+DECIMAL_PATTERN = re.compile(r'\s*([+-]?)(\d*)(?:\.(\d*))?(?:[eE]([+-]?\d+))?\s*$')
+
+
+def parse_float(text):
+    """
+    `text` as pandas' default CSV float converter reads it
+
+    Up to 17 significant digits are gathered in a double (digits past that
+    only move the exponent) and the result is scaled by one power of ten.
+    Anything that is not a plain decimal (inf, nan) goes to `float()`.
+    """
+    match = DECIMAL_PATTERN.match(text)
+    if not match or not (match.group(2) or match.group(3)):
+        return float(text)
+    sign, whole, fraction, exponent_text = match.groups()
+
+    number, exponent, digits = 0.0, 0, 0
+    for digit in whole:
+        if digits < MAX_DIGITS:
+            number = number * 10. + int(digit)
+            digits += 1
+        else:
+            exponent += 1
+    kept = (fraction or '')[:max(0, MAX_DIGITS - digits)]
+    for digit in kept:
+        number = number * 10. + int(digit)
+    exponent -= len(kept)
+    if sign == '-':
+        number = -number
+    if exponent_text:
+        exponent += int(exponent_text)
+
+    if exponent > 308:
+        return math.copysign(math.inf, number)
+    if exponent > 0:
+        return number * POWERS_OF_TEN[exponent]
+    if exponent < -616:
+        return 0.0
+    if exponent < -308:
+        return number / POWERS_OF_TEN[-308 - exponent] / POWERS_OF_TEN[308]
+    return number / POWERS_OF_TEN[-exponent]
+
+
+def round_float(value, decimals):
+    """`np.round(value, decimals)`: scale, round half to even, unscale"""
+    if not math.isfinite(value):
+        return value
+    scale = 10.0 ** decimals
+    return round(value * scale) / scale
+
+
+def convert_column(values, decimals=2):
+    """Typed, NA-filled values of one CSV column"""
+    present = [value for value in values if value not in NA_VALUES]
+    if len(present) == len(values):
+        try:
+            return [int(value) for value in values]
+        except ValueError:
+            pass
+    try:
+        floats = [parse_float(value) if value not in NA_VALUES else 0.0 for value in values]
+    except ValueError:
+        return [value if value not in NA_VALUES else 0 for value in values]
+
+    floats = [0.0 if math.isnan(value) else value for value in floats]
+    return [round_float(value, decimals) for value in floats] if decimals is not None else floats
+
+
+def read_records(path, decimals=2):
+    """CSV rows as dicts of typed values (see `convert_column`)"""
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        rows = list(reader)
+    if not rows:
+        return []
+    columns = [convert_column([row[i] for row in rows], decimals) for i in range(len(header))]
+    return [dict(zip(header, values)) for values in zip(*columns)]
+
+
+def group_records(rows, key):
+    """{key value: rows without the key}, groups and rows in file order"""
+    groups = {}
+    for row in rows:
+        row = dict(row)
+        groups.setdefault(row.pop(key), []).append(row)
+    return groups
@@ -0,0 +1,77 @@
+"""
+Weight Re-scoring
+Cached per-period component matrices for instant custom-weight rankings
+
+Each period's five component scores are held as a (suburbs x 5) matrix of
+fractions of their default weights. Every component is linear in its weight,
+so a custom weighting is one matrix-vector product plus an argsort, with no
+pipeline rerun. The default weights are the pipeline's, read from the
+component_weights.json it exports next to the scores.
+"""
+
+import math
+import numpy as np
+
+
+def weight_params(default_weights):
+    """Query parameter names for each component column: ?price_growth=40&yield=20 ..."""
+    return {column[:-len('_score')]: column for column in default_weights}
+
+
+def parse_weights(args, default_weights):
+    """
+    Component weights from request args, defaulting missing ones to `default_weights`
+
+    Weights are rescaled to sum to 100 so custom scores stay on the 0-100 scale.
+    Raises ValueError for non-numeric, non-finite, negative or all-zero weights.
+    """
+    weights = dict(default_weights)
+    for param, column in weight_params(default_weights).items():
+        if param in args:
+            weights[column] = float(args[param])
+            if not math.isfinite(weights[column]):
+                raise ValueError(f'{param} weight must be a finite number')
+            if weights[column] < 0:
+                raise ValueError(f'{param} weight must not be negative')
+
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError('At least one weight must be positive')
+    return {column: weight * 100 / total for column, weight in weights.items()}
+
+
+class ComponentMatrix:
+    """One period's component fractions (from its row dicts) with the default scores and ranks"""
+
+    def __init__(self, rows, default_weights):
+        self.columns = list(default_weights)
+        self.suburbs = np.array([row['suburb'] for row in rows], dtype=object)
+        self.fractions = np.array([
+            [row[column] / weight for column, weight in default_weights.items()]
+            for row in rows
+        ], dtype=float).reshape(len(rows), len(self.columns))
+        self.default_scores = np.array([row['total_score'] for row in rows], dtype=float)
+        self.default_ranks = np.empty(len(self.suburbs), dtype=int)
+        self.default_ranks[np.argsort(-self.default_scores, kind='stable')] = np.arange(1, len(self.suburbs) + 1)
+
+    def __len__(self):
+        return len(self.suburbs)
+
+    def rescore(self, weights, limit=None):
+        """Suburbs ranked by their score under `weights` (highest first)"""
+        vector = np.array([weights[column] for column in self.columns])
+        scores = self.fractions @ vector
+        order = np.argsort(-scores, kind='stable')
+        if limit:
+            order = order[:limit]
+        return [
+            {
+                'rank': rank,
+                'suburb': self.suburbs[i],
+                'total_score': round(float(scores[i]), 2),
+                'default_score': float(self.default_scores[i]),
+                'default_rank': int(self.default_ranks[i]),
+                'rank_change': int(self.default_ranks[i] - rank)
+            }
+            for rank, i in enumerate(order, 1)
+        ]
@@ -0,0 +1,42 @@
+"""
+Score Snapshot Reader
+Memory-mapped period scores and comparison table from the pipeline snapshot
+
+`score_snapshot.py` in the pipeline writes every period's scores back to back
+into one Arrow IPC file, with each period's (offset, length) in the schema
+metadata, and the comparison table into a second IPC file. Reading maps both
+files and slices periods out of the mapping: no parsing, and pages are only
+touched when a period is converted or served.
+"""
+
+import json
+from pathlib import Path
+
+# Written next to the CSV exports by score_snapshot.write_score_snapshot
+SNAPSHOT_FILENAME = 'scores_snapshot.arrow'
+COMPARISON_SNAPSHOT_FILENAME = 'comparison_snapshot.arrow'
+# Default component weights (scoring.COMPONENT_WEIGHTS), read by the re-scoring endpoint
+COMPONENT_WEIGHTS_FILENAME = 'component_weights.json'
+
+
+def read_score_snapshot(path):
+    """
+    ({period_id: Arrow table}, comparison Arrow table), periods sliced from one memory map
+
+    The comparison is read from its file next to `path`. Raises ValueError
+    when it is missing or from a different pipeline run (a write in progress).
+    """
+    # Imported here so the app can import the filenames without loading pyarrow
+    import pyarrow as pa
+    comparison_path = Path(path).with_name(COMPARISON_SNAPSHOT_FILENAME)
+    if not comparison_path.exists():
+        raise ValueError(f'{COMPARISON_SNAPSHOT_FILENAME} not found next to {Path(path).name}')
+
+    scores = pa.ipc.open_file(pa.memory_map(str(path), 'r')).read_all()
+    comparison = pa.ipc.open_file(pa.memory_map(str(comparison_path), 'r')).read_all()
+    if scores.schema.metadata.get(b'generation') != (comparison.schema.metadata or {}).get(b'generation'):
+        raise ValueError(f'{Path(path).name} and {COMPARISON_SNAPSHOT_FILENAME} are from different pipeline runs')
+
+    ranges = json.loads(scores.schema.metadata[b'periods'])
+    periods = {period_id: scores.slice(offset, length) for period_id, (offset, length) in ranges.items()}
+    return periods, comparison
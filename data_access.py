@@ -0,0 +1,100 @@
+"""
+Data Access Layer
+Projected, predicate-pushed Parquet reads for transactions, GNAF and the enriched artifact
+
+Every read names the columns its stage needs and hands its price/date/pid
+filters to the pyarrow scanner. Unrequested columns are never decoded, and
+row groups whose min/max statistics fall outside a filter are skipped
+without being read, so memory follows the rows and columns a stage uses
+rather than the size of the file (the national GNAF file is gigabytes; the
+geocodes for the pids being scored are megabytes).
+
+Transactions can also come from the hive-partitioned store
+(`partitioned_store.py`, state=/suburb=/year=); suburb and date filters then
+prune whole partition directories as well.
+"""
+
+import os
+import pandas as pd
+import pyarrow.dataset as ds
+
+TRANSACTIONS_PATH = 'transactions.parquet'
+DATASET_PATH = 'transactions_dataset'
+GNAF_PATH = 'gnaf_prop.parquet'
+
+GEOCODE_COLUMNS = ['gnaf_pid', 'latitude', 'longitude', 'geocode_type', 'reliability']
+# Enriched columns the scoring scripts read
+SCORING_COLUMNS = ['gnaf_pid', 'suburb', 'sale_date', 'price', 'latitude', 'longitude']
+
+
+def transactions_source():
+    """The partitioned store when it has been built, else the monolithic file"""
+    return DATASET_PATH if os.path.isdir(DATASET_PATH) else TRANSACTIONS_PATH
+
+
+def open_dataset(path):
+    """pyarrow dataset over a Parquet file or a hive-partitioned directory"""
+    partitioning = 'hive' if os.path.isdir(path) else None
+    return ds.dataset(path, format='parquet', partitioning=partitioning)
+
+
+def sale_filter(date_column, since=None, until=None):
+    """Priced sales (price > 0, which also drops nulls) within [since, until)"""
+    expression = ds.field('price') > 0
+    if since is not None:
+        expression &= ds.field(date_column) >= pd.Timestamp(since)
+    if until is not None:
+        expression &= ds.field(date_column) < pd.Timestamp(until)
+    return expression
+
+
+def scan(path, columns=None, filter=None):
+    """Read `columns` of the rows matching `filter` into a DataFrame"""
+    return open_dataset(path).to_table(columns=columns, filter=filter).to_pandas()
+
+
+def read_transactions(path=None, columns=None, since=None, until=None, suburbs=None):
+    """
+    Priced sales, optionally restricted to columns, a sale-date range and suburbs
+
+    `dat` is read whenever it is needed for the `sale_date` column; filters on
+    price, date and suburb run inside the scan. `path` defaults to
+    `transactions_source()`.
+    """
+    path = path or transactions_source()
+    filter = sale_filter('dat', since, until)
+    if suburbs is not None:
+        filter &= ds.field('suburb').isin(list(suburbs))
+    if os.path.isdir(path):
+        # Year keys let the scan skip whole partition directories
+        if since is not None:
+            filter &= ds.field('year') >= pd.Timestamp(since).year
+        if until is not None:
+            filter &= ds.field('year') <= pd.Timestamp(until).year
+
+    read_columns = None
+    if columns is not None:
+        read_columns = list(dict.fromkeys(['dat' if c == 'sale_date' else c for c in columns] + ['dat']))
+    df = scan(path, read_columns, filter)
+    if columns is None:
+        df = df.drop(columns='year', errors='ignore')
+    df['sale_date'] = pd.to_datetime(df['dat'])
+    if columns is not None:
+        df = df[list(columns) + [c for c in ['sale_date'] if c not in columns]]
+    return df
+
+
+def read_gnaf(path=GNAF_PATH, pids=None, columns=GEOCODE_COLUMNS):
+    """GNAF rows for `pids` only (all rows if None), projected to `columns`"""
+    filter = None
+    if pids is not None:
+        filter = ds.field('gnaf_pid').isin(pd.unique(pd.Series(pids).dropna()).tolist())
+    return scan(path, columns, filter)
+
+
+def read_enriched(path, columns=None, since=None, until=None, suburbs=None):
+    """Enriched artifact rows in [since, until) for `suburbs`, geometry-free unless 'geometry' is requested"""
+    filter = sale_filter('sale_date', since, until)
+    if suburbs is not None:
+        filter &= ds.field('suburb').isin(list(suburbs))
+    return scan(path, columns, filter)
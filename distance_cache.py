@@ -0,0 +1,189 @@
+"""
+Road Distance Cache
+Persistent per-address nearest-major-road distances, stored as Parquet
+
+A distance only depends on an address's coordinates and on the road layer, so
+results are kept on disk between runs. The cache file is keyed on a content
+hash of `roads.gpkg` plus the major-road class filter; editing either starts a
+fresh cache. On a rerun only addresses missing from the cache are computed.
+
+GNAF can carry more than one geocode per gnaf_pid, so a cached row is one
+address point: (gnaf_pid, latitude, longitude).
+
+Lookups read only the rows of the gnaf_pids asked for. New distances are
+spilled to small segment files next to the cache and folded into it by one
+streamed rewrite when the caller is done. Neither step holds the whole cache
+in memory. Segments left by an interrupted run are still read, and are
+folded in by the next write.
+"""
+
+import hashlib
+import uuid
+from pathlib import Path
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from road_proximity import MAJOR_ROAD_CLASSES, METRIC_CRS, load_major_roads, nearest_road_distance
+from parallel_geometry import DEFAULT_WORKERS, parallel_road_distances
+
+CACHE_DIR = Path('cache')
+ADDRESS_KEY = ['gnaf_pid', 'latitude', 'longitude']
+DISTANCE_COLUMN = 'distance_to_major_road_m'
+CACHE_SCHEMA = pa.schema([
+    ('gnaf_pid', pa.string()),
+    ('latitude', pa.float64()),
+    ('longitude', pa.float64()),
+    (DISTANCE_COLUMN, pa.float64())
+])
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def roads_layer_key(roads_path='roads.gpkg', classes=MAJOR_ROAD_CLASSES):
+    """Cache key for a road layer version and major-road filter"""
+    digest = hashlib.sha256(file_hash(roads_path).encode())
+    digest.update('|'.join(sorted(classes)).encode())
+    digest.update(METRIC_CRS.encode())
+    return digest.hexdigest()[:16]
+
+
+def cache_path(key, cache_dir=CACHE_DIR):
+    return Path(cache_dir) / f'road_distances_{key}.parquet'
+
+
+def spill_dir(key, cache_dir=CACHE_DIR):
+    """Directory of distance segments not yet folded into the cache file"""
+    return Path(cache_dir) / f'road_distances_{key}.pending'
+
+
+def cache_files(key, cache_dir=CACHE_DIR):
+    """The cache file (if any) followed by its unfolded segments"""
+    path = cache_path(key, cache_dir)
+    return ([path] if path.exists() else []) + sorted(spill_dir(key, cache_dir).glob('*.parquet'))
+
+
+def load_distance_cache(key, cache_dir=CACHE_DIR, pids=None):
+    """Cached distances for a road layer key, for `pids` only if given (empty frame if none yet)"""
+    files = cache_files(key, cache_dir)
+    if not files:
+        return CACHE_SCHEMA.empty_table().to_pandas()
+    filter = None
+    if pids is not None:
+        filter = ds.field('gnaf_pid').isin(pd.unique(pd.Series(pids, dtype=object).dropna()).tolist())
+    dataset = ds.dataset([str(f) for f in files], schema=CACHE_SCHEMA, format='parquet')
+    # A segment folded in just before an interrupted cleanup can repeat rows
+    return dataset.to_table(filter=filter).to_pandas().drop_duplicates(ADDRESS_KEY)
+
+
+def append_distance_cache(rows, key, cache_dir=CACHE_DIR):
+    """Spill newly computed distances to a segment of their own"""
+    segments = spill_dir(key, cache_dir)
+    segments.mkdir(parents=True, exist_ok=True)
+    rows = rows[CACHE_SCHEMA.names].assign(gnaf_pid=rows['gnaf_pid'].astype(object))
+    path = segments / f'{uuid.uuid4().hex[:12]}.parquet'
+    tmp_path = path.with_suffix('.tmp')
+    pq.write_table(pa.Table.from_pandas(rows, schema=CACHE_SCHEMA, preserve_index=False), tmp_path)
+    tmp_path.replace(path)
+
+
+def save_distance_cache(key, cache_dir=CACHE_DIR):
+    """Fold spilled segments into the cache for `key` and drop caches built from older road layers"""
+    cache_dir = Path(cache_dir)
+    segments = sorted(spill_dir(key, cache_dir).glob('*.parquet'))
+    if segments:
+        path = cache_path(key, cache_dir)
+        tmp_path = path.with_suffix('.tmp')
+        dataset = ds.dataset([str(f) for f in cache_files(key, cache_dir)], schema=CACHE_SCHEMA, format='parquet')
+        with pq.ParquetWriter(tmp_path, CACHE_SCHEMA) as writer:
+            for batch in dataset.to_batches():
+                writer.write_batch(batch)
+        tmp_path.replace(path)
+        for segment in segments:
+            segment.unlink()
+        spill_dir(key, cache_dir).rmdir()
+    for stale in cache_dir.glob('road_distances_*.parquet'):
+        if stale != cache_path(key, cache_dir):
+            stale.unlink()
+    for stale in cache_dir.glob('road_distances_*.pending'):
+        if stale != spill_dir(key, cache_dir):
+            for segment in stale.iterdir():
+                segment.unlink()
+            stale.rmdir()
+
+
+class DistanceCache:
+    """
+    One road layer's cache looked up across many batches, written back once
+
+    The layer key is hashed and the major roads loaded once. Each lookup reads
+    only the cached rows of its own gnaf_pids; new distances are spilled to
+    segments and `flush` folds them into the cache file, so a caller with
+    many batches (streaming) holds neither the cache nor its growth in
+    memory, and does not rewrite the cache per batch.
+    """
+
+    def __init__(self, roads_path='roads.gpkg', classes=MAJOR_ROAD_CLASSES, cache_dir=CACHE_DIR,
+                 major_roads=None, workers=None):
+        self.roads_path = roads_path
+        self.classes = classes
+        self.cache_dir = cache_dir
+        self.major_roads = major_roads
+        self.workers = workers
+        self.key = roads_layer_key(roads_path, classes)
+
+    def distances(self, points):
+        """Distances for every distinct address point in `points`, computing only uncached ones"""
+        addresses = points[ADDRESS_KEY].dropna(subset=['latitude', 'longitude']).drop_duplicates()
+        cached = load_distance_cache(self.key, self.cache_dir, pids=addresses['gnaf_pid'])
+        lookup = addresses.merge(cached, on=ADDRESS_KEY, how='left', indicator=True)
+        is_missing = (lookup.pop('_merge') == 'left_only').to_numpy()
+        missing = lookup.loc[is_missing, ADDRESS_KEY]
+
+        if len(missing) > 0:
+            print(f"   Road distance cache: {len(addresses) - len(missing):,} hits, "
+                  f"{len(missing):,} to compute")
+            missing = missing.copy()
+            if (self.workers or DEFAULT_WORKERS) > 1:
+                missing[DISTANCE_COLUMN] = parallel_road_distances(
+                    missing['longitude'], missing['latitude'], self.roads_path, self.workers, classes=self.classes
+                )
+            else:
+                if self.major_roads is None:
+                    self.major_roads = load_major_roads(self.roads_path, self.classes)
+                missing[DISTANCE_COLUMN] = nearest_road_distance(
+                    missing['longitude'], missing['latitude'], self.major_roads
+                )
+            append_distance_cache(missing, self.key, self.cache_dir)
+            lookup.loc[is_missing, DISTANCE_COLUMN] = missing[DISTANCE_COLUMN].to_numpy()
+        else:
+            print(f"   Road distance cache: all {len(addresses):,} addresses cached")
+
+        return lookup
+
+    def flush(self):
+        """Fold the distances spilled since the cache was last written into the cache file"""
+        save_distance_cache(self.key, self.cache_dir)
+
+
+def cached_road_distances(points, roads_path='roads.gpkg', classes=MAJOR_ROAD_CLASSES,
+                          cache_dir=CACHE_DIR, major_roads=None, workers=None):
+    """
+    Distance to the nearest major road for every address point in `points`
+
+    `points` needs gnaf_pid, latitude and longitude columns. Returns one row per
+    distinct address point with `distance_to_major_road_m`; only addresses not
+    already cached for this road layer are computed, across `workers`
+    processes when more than one is configured.
+    """
+    cache = DistanceCache(roads_path, classes, cache_dir, major_roads, workers)
+    distances = cache.distances(points)
+    cache.flush()
+    return distances
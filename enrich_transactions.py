@@ -0,0 +1,288 @@
+"""
+Transaction Enrichment Stage
+Builds transactions_enriched.parquet (GeoParquet) once for all scorers
+
+The artifact holds one row per priced transaction with parsed `sale_date`,
+GNAF coordinates, point geometry and derived columns such as
+`price_per_sqm`, plus cadastre parcel metrics when `cadastre.gpkg` is
+available. Scorers load it with a single columnar read instead of
+re-merging GNAF and constructing Points row by row on every run.
+
+When transactions come from the partitioned store, a sidecar manifest
+records each (state, suburb, year) partition's file mtime at build time.
+Later loads re-enrich only the partitions added, rewritten or removed since
+(a suburb refresh or an appended delta) and splice them into the artifact
+without decoding its untouched rows; a changed GNAF or cadastre file still
+means a full rebuild.
+
+Usage: python3 enrich_transactions.py
+"""
+
+import io
+import json
+import os
+from pathlib import Path
+from urllib.parse import unquote
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from compact_schema import normalize_gnaf, normalize_transactions
+from data_access import (DATASET_PATH, GNAF_PATH, read_enriched, read_gnaf, read_transactions,
+                         transactions_source)
+from distance_cache import ADDRESS_KEY
+from parcel_enrichment import CADASTRE_PATH, cached_parcel_attributes
+
+ENRICHED_PATH = 'transactions_enriched.parquet'
+
+
+def principal_geocodes(df_gnaf):
+    """One coordinate per gnaf_key, preferring the property centroid and the most reliable geocode"""
+    ranked = df_gnaf.assign(
+        _not_centroid=df_gnaf['geocode_type'] != 'PROPERTY CENTROID'
+    ).sort_values(['gnaf_key', '_not_centroid', 'reliability'], kind='stable')
+    return ranked.drop_duplicates('gnaf_key')[['gnaf_key', 'latitude', 'longitude']]
+
+
+def enrich(df_trans, gnaf_path=GNAF_PATH, cadastre_path=CADASTRE_PATH):
+    """GeoDataFrame of normalized transactions with coordinates, parcel metrics and point geometry"""
+    df_trans = df_trans.copy()
+    # GNAF is read for the sold pids only
+    df_gnaf = normalize_gnaf(read_gnaf(gnaf_path, pids=df_trans['gnaf_pid'].astype(object)))
+
+    df_trans['price_per_sqm'] = np.where(
+        (df_trans['land_size'].notna()) & (df_trans['land_size'] > 0),
+        df_trans['price'] / df_trans['land_size'],
+        np.nan
+    )
+
+    df_trans = df_trans.merge(principal_geocodes(df_gnaf), on='gnaf_key', how='left')
+
+    if cadastre_path and os.path.exists(cadastre_path):
+        parcels = cached_parcel_attributes(df_trans, cadastre_path)
+        df_trans = df_trans.merge(parcels, on=ADDRESS_KEY, how='left')
+
+    has_coords = df_trans['latitude'].notna() & df_trans['longitude'].notna()
+    geometry = gpd.points_from_xy(df_trans['longitude'], df_trans['latitude'])
+    geometry[~has_coords.values] = None
+    return gpd.GeoDataFrame(df_trans, geometry=geometry, crs='EPSG:4326')
+
+
+def write_enriched(data, output_path):
+    """Write the artifact (a GeoDataFrame or an Arrow table) via a temporary file and an atomic rename"""
+    tmp_path = f'{output_path}.tmp'
+    if isinstance(data, pa.Table):
+        pq.write_table(data, tmp_path)
+    else:
+        data.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, output_path)
+
+
+def enriched_table(gdf):
+    """Arrow table of a GeoDataFrame exactly as `write_enriched` would store it"""
+    buffer = io.BytesIO()
+    gdf.to_parquet(buffer, index=False)
+    return pq.read_table(buffer)
+
+
+def decoded_schema(schema):
+    """`schema` with dictionary (category) columns as their plain value type"""
+    return pa.schema([
+        field.with_type(field.type.value_type) if pa.types.is_dictionary(field.type) else field
+        for field in schema
+    ], metadata=schema.metadata)
+
+
+def encode_categories(table, schema):
+    """Re-encode the dictionary columns of `schema` with sorted categories, as pandas builds them"""
+    for i, field in enumerate(schema):
+        if pa.types.is_dictionary(field.type):
+            values = table[field.name]
+            categories = pc.drop_null(pc.unique(values)).sort()
+            indices = pc.index_in(values, value_set=categories).cast(pa.int32())
+            encoded = pa.DictionaryArray.from_arrays(indices.combine_chunks(), categories)
+            table = table.set_column(i, field.with_type(encoded.type), encoded)
+    return table
+
+
+def with_geo_bbox(table):
+    """`table` with the GeoParquet bbox recomputed from its latitude/longitude columns"""
+    geo = json.loads(table.schema.metadata[b'geo'])
+    column = geo['columns'][geo['primary_column']]
+    if 'bbox' in column:
+        lon, lat = pc.min_max(table['longitude']), pc.min_max(table['latitude'])
+        if lon['min'].is_valid:
+            column['bbox'] = [lon['min'].as_py(), lat['min'].as_py(), lon['max'].as_py(), lat['max'].as_py()]
+        else:
+            del column['bbox']
+    return table.replace_schema_metadata({**table.schema.metadata, b'geo': json.dumps(geo).encode()})
+
+
+def manifest_path(output_path=ENRICHED_PATH):
+    """Sidecar recording which dataset partitions (and their file mtimes) the artifact was built from"""
+    return Path(output_path).with_suffix('.partitions.json')
+
+
+def partition_mtimes(dataset_path=DATASET_PATH):
+    """{'state|suburb|year': newest file mtime} for every leaf partition of the hive dataset"""
+    mtimes = {}
+    for root, _, names in os.walk(dataset_path):
+        files = [name for name in names if name.endswith('.parquet')]
+        if not files:
+            continue
+        keys = dict(unquote(part).split('=', 1) for part in Path(root).relative_to(dataset_path).parts)
+        key = f"{keys['state']}|{keys['suburb']}|{int(keys['year'])}"
+        mtimes[key] = max(os.path.getmtime(os.path.join(root, name)) for name in files)
+    return mtimes
+
+
+def partition_keys(df):
+    """'state|suburb|year' partition key of each row"""
+    return (df['state'].astype(str) + '|' + df['suburb'].astype(str) + '|'
+            + df['sale_date'].dt.year.astype(str))
+
+
+def partition_filter(keys):
+    """Dataset expression matching the artifact rows of the given 'state|suburb|year' keys"""
+    expression = ds.scalar(False)
+    for key in keys:
+        state, suburb, year = key.split('|')
+        year = int(year)
+        expression |= ((ds.field('state') == state) & (ds.field('suburb') == suburb) &
+                       (ds.field('sale_date') >= pd.Timestamp(year, 1, 1)) &
+                       (ds.field('sale_date') < pd.Timestamp(year + 1, 1, 1)))
+    return expression
+
+
+def build_enriched_transactions(transactions_path=None, gnaf_path=GNAF_PATH,
+                                output_path=ENRICHED_PATH, cadastre_path=CADASTRE_PATH):
+    """Join transactions to GNAF coordinates, build point geometry in bulk and write GeoParquet"""
+    transactions_path = transactions_path or transactions_source()
+    # Price filter runs in the scan
+    gdf = enrich(normalize_transactions(read_transactions(transactions_path)), gnaf_path, cadastre_path)
+
+    partitioned = os.path.isdir(transactions_path)
+    if partitioned:
+        # Same row order as a per-partition refresh produces
+        gdf = gdf.sort_values(['state', 'suburb', 'sale_date'], kind='stable').reset_index(drop=True)
+    write_enriched(gdf, output_path)
+    manifest = manifest_path(output_path)
+    if partitioned:
+        manifest.write_text(json.dumps(partition_mtimes(transactions_path)))
+    elif manifest.exists():
+        manifest.unlink()
+    return gdf
+
+
+def changed_partitions(output_path=ENRICHED_PATH, dataset_path=DATASET_PATH):
+    """
+    Partition keys added, rewritten or removed since the artifact was built
+
+    None when the artifact has no manifest (built from the monolithic file,
+    or by an older version), meaning it can only be rebuilt in full.
+    """
+    manifest = manifest_path(output_path)
+    if not manifest.exists():
+        return None
+    built = json.loads(manifest.read_text())
+    current = partition_mtimes(dataset_path)
+    return {key for key in built.keys() | current.keys() if built.get(key) != current.get(key)}
+
+
+def refresh_enriched_partitions(keys, dataset_path=DATASET_PATH, gnaf_path=GNAF_PATH,
+                                output_path=ENRICHED_PATH, cadastre_path=CADASTRE_PATH):
+    """
+    Re-enrich only the rows of the given dataset partitions and splice them into the artifact
+
+    Rows of removed partitions are dropped. GNAF, parcel and geometry work
+    is proportional to the changed partitions. The rest of the artifact is
+    read as Arrow with the changed partitions filtered out in the scan, so
+    its rows are never decoded into pandas or shapely; the file itself is
+    rewritten once. Re-enriched rows go through the full
+    `normalize_transactions` pass and are cast to the artifact's schema, and
+    categories are re-encoded from the spliced rows, so every column keeps
+    the dtype a full build gives it.
+    """
+    keys = set(keys)
+    suburbs = {key.split('|')[1] for key in keys}
+    changed = read_transactions(dataset_path, suburbs=suburbs)
+    changed = changed[partition_keys(changed).isin(keys).to_numpy()]
+
+    touched = partition_filter(keys)
+    existing = ds.dataset(output_path, format='parquet').to_table(filter=~touched | touched.is_null())
+    schema = pq.read_schema(output_path)
+    plain = decoded_schema(schema)
+    parts = [existing.cast(plain)]
+    if len(changed) > 0:
+        refreshed = enriched_table(enrich(normalize_transactions(changed), gnaf_path, cadastre_path))
+        parts.append(refreshed.select(plain.names).cast(plain))
+
+    # Same row order and categories as a full build
+    table = pa.concat_tables(parts).sort_by([
+        ('state', 'ascending'), ('suburb', 'ascending'), ('sale_date', 'ascending')
+    ])
+    table = encode_categories(table, schema)
+    write_enriched(with_geo_bbox(table), output_path)
+    manifest_path(output_path).write_text(json.dumps(partition_mtimes(dataset_path)))
+
+
+def is_stale(output_path=ENRICHED_PATH, sources=None):
+    """True if the artifact is missing or older than any of its input files"""
+    if not os.path.exists(output_path):
+        return True
+    sources = sources or (transactions_source(), GNAF_PATH, CADASTRE_PATH)
+    built = os.path.getmtime(output_path)
+    return any(os.path.getmtime(source) > built for source in sources
+               if os.path.exists(source) and not os.path.isdir(source))
+
+
+def refresh_enriched_transactions(path=ENRICHED_PATH):
+    """
+    Bring the artifact up to date; returns the GeoDataFrame if it was rebuilt in full, else None
+
+    A changed GNAF or cadastre file, a changed monolithic transactions file
+    or a missing partition manifest means a full build. Against the
+    partitioned store, only partitions whose files changed are re-enriched.
+    """
+    source = transactions_source()
+    partitioned = os.path.isdir(source)
+    changed = changed_partitions(path, source) if partitioned else None
+    if is_stale(path) or (partitioned and changed is None):
+        print(f"Building {path}...")
+        return build_enriched_transactions(source, output_path=path)
+    if changed:
+        print(f"Refreshing {len(changed):,} changed partitions in {path}...")
+        refresh_enriched_partitions(changed, source, output_path=path)
+    return None
+
+
+def load_enriched_transactions(path=ENRICHED_PATH, columns=None, since=None, suburbs=None, rebuild=False):
+    """
+    Load the enriched artifact, (re)building it first when missing or stale
+
+    With `columns` that leave out 'geometry' a plain DataFrame is returned and
+    only those columns are decoded; `since` and `suburbs` are pushed into the
+    scan.
+    """
+    gdf = build_enriched_transactions(output_path=path) if rebuild else refresh_enriched_transactions(path)
+    if gdf is not None:
+        if since is not None:
+            gdf = gdf[gdf['sale_date'] >= since]
+        if suburbs is not None:
+            gdf = gdf[gdf['suburb'].isin(list(suburbs))]
+        return gdf if columns is None else gdf[columns]
+    if columns is not None and 'geometry' not in columns:
+        return read_enriched(path, columns, since=since, suburbs=suburbs)
+    filters = [('sale_date', '>=', pd.Timestamp(since))] if since is not None else []
+    if suburbs is not None:
+        filters.append(('suburb', 'in', list(suburbs)))
+    return gpd.read_parquet(path, columns=columns, filters=filters or None)
+
+
+if __name__ == '__main__':
+    gdf = build_enriched_transactions()
+    print(f"✅ Wrote {ENRICHED_PATH}: {len(gdf):,} transactions, "
+          f"{gdf['latitude'].notna().sum():,} geocoded")
@@ -12,16 +12,31 @@ Where:
   L = Market Liquidity (transaction activity trends)
 """
 
+import os
 import pandas as pd
 import geopandas as gpd
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 from matplotlib.gridspec import GridSpec
-from shapely.geometry import Point
+from data_access import SCORING_COLUMNS
+from enrich_transactions import load_enriched_transactions
+from road_proximity import load_major_roads
+from distance_cache import ADDRESS_KEY, cached_road_distances
+from road_network import network_road_distances
+from scoring import (FINAL_OUTPUT_COLUMNS, RECENT_RELIABILITY_BANDS, RECENT_RELIABILITY_DEFAULT,
+                     investment_signals, score_period)
 import warnings
 warnings.filterwarnings('ignore')
 
+# Accessibility distance: 'euclidean' (straight line to nearest major road) or
+# 'network' (shortest path over roads.gpkg to the major road network)
+ACCESSIBILITY_MODE = 'euclidean'
+
+# ANALYSIS_SUBURBS=ROSEVILLE,CHATSWOOD scores only those suburbs: the filter is
+# pushed into the scan, while the price scale and latest sale stay market-wide
+ANALYSIS_SUBURBS = [s.strip().upper() for s in os.environ.get('ANALYSIS_SUBURBS', '').split(',') if s.strip()] or None
+
 print("="*80)
 print("🏆 MICROBURBS INVESTMENT SCORE ANALYSIS")
 print("   12-Month Window | Comprehensive Formula")
@@ -31,24 +46,32 @@ print("="*80)
 # STEP 1: LOAD DATA
 # ============================================================================
 print("\n📂 Step 1: Loading data...")
-df_trans = pd.read_parquet('transactions.parquet')
-df_gnaf = pd.read_parquet('gnaf_prop.parquet')
-gdf_roads = gpd.read_file('roads.gpkg')
+# Affordability is scaled by the all-history 95th percentile price and every
+# suburb ever sold in is a candidate, so those come from a narrow scan of all
+# rows; the full scoring columns are only read for the 24 months scored.
+market = load_enriched_transactions(columns=['suburb', 'sale_date', 'price'])
+max_price = market['price'].quantile(0.95)
+all_suburbs = market['suburb'].unique()
+if ANALYSIS_SUBURBS is not None:
+    all_suburbs = [suburb for suburb in all_suburbs if suburb in set(ANALYSIS_SUBURBS)]
+latest_date = market['sale_date'].max()
+twelve_months_ago = latest_date - pd.DateOffset(months=12)
+twenty_four_months_ago = latest_date - pd.DateOffset(months=24)
 
-df_trans['sale_date'] = pd.to_datetime(df_trans['dat'])
-df_trans = df_trans[df_trans['price'].notna() & (df_trans['price'] > 0)].copy()
+df_trans = load_enriched_transactions(columns=SCORING_COLUMNS, since=twenty_four_months_ago,
+                                     suburbs=ANALYSIS_SUBURBS)
+gdf_roads = gpd.read_file('roads.gpkg')
 
-print(f"✅ Loaded {len(df_trans):,} transactions")
-print(f"✅ Loaded {len(df_gnaf):,} properties")
+print(f"✅ Loaded {len(df_trans):,} transactions since {twenty_four_months_ago.strftime('%Y-%m-%d')} "
+      f"({len(market):,} in total)")
+print(f"✅ Geocoded {df_trans['latitude'].notna().sum():,} transactions")
 print(f"✅ Loaded {len(gdf_roads):,} roads")
+del market
 
 # ============================================================================
 # STEP 2: DEFINE TIME WINDOWS (12-MONTH ANALYSIS)
 # ============================================================================
 print("\n⏰ Step 2: Defining time windows...")
-latest_date = df_trans['sale_date'].max()
-twelve_months_ago = latest_date - pd.DateOffset(months=12)
-twenty_four_months_ago = latest_date - pd.DateOffset(months=24)
 
 recent = df_trans[df_trans['sale_date'] >= twelve_months_ago]
 previous = df_trans[(df_trans['sale_date'] >= twenty_four_months_ago) & 
@@ -62,35 +85,18 @@ print(f"   Previous transactions: {len(previous):,}")
 # STEP 3: CALCULATE ROAD PROXIMITY
 # ============================================================================
 print("\n🛣️  Step 3: Calculating road proximity...")
-df_with_coords = df_trans.merge(df_gnaf[['gnaf_pid', 'latitude', 'longitude']], 
-                                on='gnaf_pid', how='left')
+df_with_coords = df_trans
 
-major_roads = gdf_roads[gdf_roads['fclass'].isin(['motorway', 'primary', 'secondary', 'trunk'])]
+major_roads = load_major_roads(gdf_roads)
 print(f"   Major roads identified: {len(major_roads)}")
 
-properties_with_geom = df_with_coords[df_with_coords['latitude'].notna()].copy()
-properties_with_geom['geometry'] = properties_with_geom.apply(
-    lambda row: Point(row['longitude'], row['latitude']), axis=1
-)
-gdf_properties = gpd.GeoDataFrame(properties_with_geom, geometry='geometry', crs='EPSG:4326')
-
 if len(major_roads) > 0:
-    major_roads = major_roads.to_crs('EPSG:4326')
-    
-    def min_distance_to_roads(point_geom):
-        try:
-            distances = major_roads.geometry.distance(point_geom)
-            return distances.min() * 111000  # Convert to meters
-        except:
-            return np.nan
-    
-    recent_with_coords = gdf_properties[gdf_properties['sale_date'] >= twelve_months_ago]
-    recent_with_coords['distance_to_major_road_m'] = recent_with_coords.geometry.apply(min_distance_to_roads)
-    
-    df_with_coords = df_with_coords.merge(
-        recent_with_coords[['gnaf_pid', 'distance_to_major_road_m']], 
-        on='gnaf_pid', how='left'
-    )
+    recent_with_coords = df_trans[df_trans['latitude'].notna() & (df_trans['sale_date'] >= twelve_months_ago)]
+    if ACCESSIBILITY_MODE == 'network':
+        road_distances = network_road_distances(recent_with_coords)
+    else:
+        road_distances = cached_road_distances(recent_with_coords, major_roads=major_roads)
+    df_with_coords = df_trans.merge(road_distances, on=ADDRESS_KEY, how='left')
     print("   ✅ Road proximity calculated")
 
 # ============================================================================
@@ -98,118 +104,20 @@ if len(major_roads) > 0:
 # ============================================================================
 print("\n🔢 Step 4: Calculating investment scores...")
 
-def estimate_rental_yield(price):
-    """Estimate rental yield based on price (Sydney market benchmarks)"""
-    if price < 800000:
-        return 5.5
-    elif price < 1500000:
-        return 4.5
-    elif price < 3000000:
-        return 3.8
-    else:
-        return 3.2
-
-def get_investment_signal(score):
-    """Map score to investment signal"""
-    if score > 75:
-        return 'STRONG BUY', '> 75', 'Ideal short- to mid-term buy', '#27ae60'
-    elif score >= 60:
-        return 'BUY', '60-75', 'Moderate risk, solid entry point', '#f39c12'
-    elif score >= 45:
-        return 'HOLD/ACCUMULATE', '45-60', 'Hold or long-term accumulation', '#3498db'
-    elif score >= 30:
-        return 'CAUTION', '30-45', 'Caution advised', '#e67e22'
-    else:
-        return 'AVOID', '< 30', 'Avoid', '#e74c3c'
+recent_coords = df_with_coords[df_with_coords['sale_date'] >= twelve_months_ago]
 
-results = []
+scores = score_period(
+    recent, previous, recent_coords, all_suburbs, max_price,
+    reliability_bands=RECENT_RELIABILITY_BANDS, reliability_default=RECENT_RELIABILITY_DEFAULT
+).rename(columns={
+    'period_median_price': 'recent_median_price',
+    'period_transactions': 'recent_transactions'
+})
+signals = investment_signals(scores['total_score'])
 
-for suburb in df_trans['suburb'].unique():
-    suburb_all = df_trans[df_trans['suburb'] == suburb]
-    suburb_recent = recent[recent['suburb'] == suburb]
-    suburb_previous = previous[previous['suburb'] == suburb]
-    suburb_coords = df_with_coords[df_with_coords['suburb'] == suburb]
-    
-    # Skip only if NO recent data at all
-    recent_count = len(suburb_recent)
-    if recent_count == 0:
-        continue
-    
-    # Component 1: Price Growth (35%)
-    recent_median = suburb_recent['price'].median()
-    if len(suburb_previous) >= 1:  # Changed from 3 to 1 - use any previous data
-        previous_median = suburb_previous['price'].median()
-        price_growth = ((recent_median - previous_median) / previous_median) * 100
-        price_growth_score = min(35, max(0, (price_growth / 10) * 35))
-    else:
-        price_growth = 0
-        price_growth_score = 17.5
-    
-    # Component 2: Affordability (15%)
-    max_price = df_trans['price'].quantile(0.95)
-    affordability_score = max(0, 15 - (recent_median / max_price) * 15)
-    
-    # Component 3: Rental Yield (25%)
-    estimated_yield = estimate_rental_yield(recent_median)
-    annual_rent = recent_median * estimated_yield / 100
-    monthly_rent = annual_rent / 12
-    yield_score = min(25, (estimated_yield / 6) * 25)
-    
-    # Component 4: Accessibility (15%)
-    suburb_recent_coords = suburb_coords[suburb_coords['sale_date'] >= twelve_months_ago]
-    if len(suburb_recent_coords[suburb_recent_coords['distance_to_major_road_m'].notna()]) > 0:
-        avg_distance = suburb_recent_coords['distance_to_major_road_m'].median()
-        accessibility_score = max(0, 15 - (avg_distance / 5000) * 15)
-    else:
-        avg_distance = None
-        accessibility_score = 7.5
-    
-    # Component 5: Market Liquidity (10%)
-    previous_count = len(suburb_previous)
-    
-    # Reliability indicator
-    reliability = 'HIGH' if recent_count >= 5 else 'MODERATE' if recent_count >= 3 else 'LOW'
-    if previous_count > 0:
-        activity_change = ((recent_count - previous_count) / previous_count) * 100
-        liquidity_score = min(10, max(0, 5 + (activity_change / 100) * 5))
-    else:
-        activity_change = 100
-        liquidity_score = 8
-    
-    # Total Score
-    total_score = (price_growth_score + affordability_score + 
-                   yield_score + accessibility_score + liquidity_score)
-    
-    # Get investment signal
-    action, score_range, signal, color = get_investment_signal(total_score)
-    
-    results.append({
-        'suburb': suburb,
-        'total_score': total_score,
-        'action': action,
-        'score_range': score_range,
-        'investment_signal': signal,
-        'reliability': reliability,
-        
-        # Component scores
-        'price_growth_score': price_growth_score,
-        'affordability_score': affordability_score,
-        'yield_score': yield_score,
-        'accessibility_score': accessibility_score,
-        'liquidity_score': liquidity_score,
-        
-        # Raw metrics
-        'recent_median_price': recent_median,
-        'price_growth_pct': price_growth,
-        'estimated_yield_pct': estimated_yield,
-        'estimated_monthly_rent': monthly_rent,
-        'avg_distance_to_road_m': avg_distance,
-        'recent_transactions': recent_count,
-        'previous_transactions': previous_count,
-        'activity_change_pct': activity_change
-    })
-
-final_df = pd.DataFrame(results).sort_values('total_score', ascending=False)
+results = pd.concat([scores, signals[['action', 'score_range', 'investment_signal']]], axis=1)[FINAL_OUTPUT_COLUMNS]
+
+final_df = results.sort_values('total_score', ascending=False)
 
 # ============================================================================
 # STEP 5: EXPORT RESULTS
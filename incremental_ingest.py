@@ -0,0 +1,455 @@
+"""
+Incremental Ingestion
+Applies a delta file of new sales to persisted suburb state and rewrites the score CSVs
+
+The full pipeline rereads every transaction. This path instead keeps, under
+cache/ingest/, the per-(suburb, month) price and road-distance sketches
+(`quantile_sketch.SketchStore`; counts are sketch weights), one market-wide
+price sketch for the affordability scale, the last window metrics for every
+period and the key (gnaf_pid, sale date, price) of every sale folded in. A
+delta is first cut down to the sales whose key is neither in the state nor
+earlier in the same file, so overlapping or re-sent extracts are harmless.
+Those are geocoded against only their own GNAF pids, their road distances
+go through the shared distance cache (so only new addresses are computed),
+and their sketches are merged in, regrouping only the suburbs they touch.
+Window metrics are then recomputed only for the suburbs the delta touches,
+unless the delta moves `latest_date` and therefore shifts every window, in
+which case every suburb is recomputed from the sketches (O(suburbs x months),
+independent of history size).
+
+State is a base plus one small segment per delta: a delta's sketches and
+sale keys go to files of their own, and the base is only rewritten once
+`MAX_SEGMENTS` segments have built up. Nothing counts until state.json names
+it. Segment, key, metrics and partitioned-store files are written first,
+under names taken from the delta's content hash, and state.json is replaced
+last, so a delta interrupted part-way is applied again by rerunning it (its
+files are overwritten, not duplicated). Other deltas are refused until then.
+
+Windows are month-grained here: a period covers whole months from the month
+of its start date to the month of `latest_date`, so scores can differ
+slightly from a full `comprehensive_analysis.py` run, which stays the
+reference rebuild. The difference is largest for thin suburbs, where a month
+more or less can move the median a long way, so a warning lists every suburb
+whose window (or the window before it) holds fewer than `MIN_WINDOW_SALES`
+sales.
+
+Usage:
+  python3 incremental_ingest.py --init           # one-off: state from the full history
+  python3 incremental_ingest.py new_sales.parquet
+"""
+
+import json
+import os
+import sys
+import uuid
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from compact_schema import gnaf_pid_key, normalize_gnaf
+from data_access import DATASET_PATH, GNAF_PATH, SCORING_COLUMNS, open_dataset, read_gnaf, sale_filter
+from distance_cache import ADDRESS_KEY, CACHE_DIR, DISTANCE_COLUMN, cached_road_distances, file_hash
+from enrich_transactions import load_enriched_transactions, principal_geocodes
+from partitioned_store import write_partitions
+from quantile_sketch import SketchStore, compress, compress_groups, month_number, sketch_quantile
+from scoring import PERIOD_OUTPUT_COLUMNS, period_comparison, score_metrics
+from score_snapshot import (COMPARISON_SNAPSHOT_FILENAME, COMPONENT_WEIGHTS_FILENAME, SNAPSHOT_FILENAME,
+                            write_score_snapshot)
+
+INGEST_DIR = CACHE_DIR / 'ingest'
+# Road distances are only computed for sales from this date, as in the full pipeline
+DISTANCE_SINCE = pd.Timestamp('2016-01-01')
+# Two rows with the same key are the same sale
+SALE_KEY = ['gnaf_pid', 'sale_date', 'price']
+# Delta segments are folded into a new base once this many have built up
+MAX_SEGMENTS = int(os.environ.get('INGEST_MAX_SEGMENTS', 30))
+# Key files are sorted by suburb, so small row groups let a suburb filter skip most of each file
+SALE_KEY_ROW_GROUP = 50_000
+# Windows with fewer sales than this (the MODERATE reliability floor) are flagged as unreliable
+MIN_WINDOW_SALES = int(os.environ.get('INGEST_MIN_WINDOW_SALES', 10))
+
+
+def analysis_windows(latest_date):
+    """{period name: (period_start, previous_start)} as in comprehensive_analysis.py"""
+    starts = {
+        '1-Year': latest_date - pd.DateOffset(months=12),
+        '3-Year': latest_date - pd.DateOffset(years=3),
+        '5-Year': latest_date - pd.DateOffset(years=5),
+        '9-Year': pd.Timestamp('2016-01-01')
+    }
+    return {name: (start, start - (latest_date - start)) for name, start in starts.items()}
+
+
+def read_delta(delta_path):
+    """(raw priced rows as an Arrow table, their scoring columns as a DataFrame) of a delta file"""
+    table = open_dataset(str(delta_path)).to_table(filter=sale_filter('dat'))
+    df = table.select(['gnaf_pid', 'suburb', 'dat', 'price']).to_pandas()
+    df['sale_date'] = pd.to_datetime(df['dat'])
+    df['suburb'] = df['suburb'].astype(str)
+    return table, df.drop(columns='dat')
+
+
+def sale_keys(df):
+    """Distinct sale keys of a transactions frame, with their suburb, sorted by suburb"""
+    keys = df[['suburb'] + SALE_KEY].drop_duplicates(SALE_KEY)
+    keys = keys.assign(suburb=keys['suburb'].astype(str), gnaf_pid=keys['gnaf_pid'].astype(object),
+                       sale_date=keys['sale_date'].astype('datetime64[ns]'), price=keys['price'].astype(float))
+    return keys.sort_values('suburb', kind='stable').reset_index(drop=True)
+
+
+def write_sale_keys(keys, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.tmp')
+    pq.write_table(pa.Table.from_pandas(keys, preserve_index=False), tmp_path, row_group_size=SALE_KEY_ROW_GROUP)
+    tmp_path.replace(path)
+
+
+def unseen_sales(df, key_paths):
+    """
+    Rows of `df` whose sale key is in none of the key files, first occurrence only
+
+    Only keys of the suburbs and pids in `df` are read; the files are sorted
+    by suburb, so other suburbs' row groups are skipped unread.
+    """
+    df = df.drop_duplicates(SALE_KEY)
+    if not key_paths or len(df) == 0:
+        return df
+    pids = ds.field('gnaf_pid').isin(df['gnaf_pid'].dropna().unique().tolist()) | ds.field('gnaf_pid').is_null()
+    filter = ds.field('suburb').isin(df['suburb'].astype(str).unique().tolist()) & pids
+    seen = ds.dataset([str(path) for path in key_paths], format='parquet').to_table(
+        columns=SALE_KEY, filter=filter
+    ).to_pandas()
+
+    seen = sale_keys(seen.assign(suburb=''))[SALE_KEY]
+    df = df.assign(sale_date=df['sale_date'].astype('datetime64[ns]'), price=df['price'].astype(float))
+    marked = df.merge(seen, on=SALE_KEY, how='left', indicator=True)
+    return marked[marked['_merge'] == 'left_only'].drop(columns='_merge').reset_index(drop=True)
+
+
+def locate_sales(df, gnaf_path=GNAF_PATH, distance_cache=None, geocodes=None):
+    """
+    Attach GNAF coordinates (read for these pids only) and cached road distances to sales
+
+    Pass `geocodes` (principal geocodes indexed by gnaf_key, loaded once by
+    the caller) to skip the GNAF read, and a `distance_cache.DistanceCache`
+    to keep one cache across calls (the caller flushes it); otherwise the
+    on-disk cache is read and updated.
+    """
+    df = df.copy()
+    df['gnaf_key'] = gnaf_pid_key(df['gnaf_pid']).to_numpy()
+    if geocodes is None:
+        geocodes = principal_geocodes(normalize_gnaf(read_gnaf(gnaf_path, pids=df['gnaf_pid'])))
+        df = df.merge(geocodes, on='gnaf_key', how='left')
+    else:
+        df = df.join(geocodes, on='gnaf_key')
+
+    geocoded = df[df['latitude'].notna() & (df['sale_date'] >= DISTANCE_SINCE)]
+    if len(geocoded) > 0:
+        distances = distance_cache.distances(geocoded) if distance_cache else cached_road_distances(geocoded)
+        df = df.merge(distances, on=ADDRESS_KEY, how='left')
+    else:
+        df[DISTANCE_COLUMN] = np.nan
+    return df
+
+
+def sketch_window_metrics(prices, distances, suburbs, period_start, previous_start, end):
+    """`scoring.suburb_window_metrics` layout computed from month sketches"""
+    period_first, period_last, previous_first = month_number([period_start, end, previous_start])
+
+    rows = []
+    for suburb in suburbs:
+        means, weights = prices.merged_months(suburb, period_first, period_last)
+        if len(means) == 0:
+            continue
+        previous_means, previous_weights = prices.merged_months(suburb, previous_first, period_first - 1)
+        distance_means, distance_weights = distances.merged_months(suburb, period_first, period_last)
+        rows.append({
+            'suburb': suburb,
+            'period_transactions': int(weights.sum()),
+            'period_median_price': sketch_quantile(means, weights, 0.5),
+            'previous_transactions': int(previous_weights.sum()),
+            'previous_median_price': sketch_quantile(previous_means, previous_weights, 0.5),
+            'avg_distance_to_road_m': sketch_quantile(distance_means, distance_weights, 0.5)
+        })
+    return pd.DataFrame(rows, columns=[
+        'suburb', 'period_transactions', 'period_median_price', 'previous_transactions',
+        'previous_median_price', 'avg_distance_to_road_m'
+    ])
+
+
+def new_generation():
+    """Random id naming the files of a freshly built state"""
+    return uuid.uuid4().hex[:12]
+
+
+def metrics_path(ingest_dir, period_name, generation):
+    return Path(ingest_dir) / f"metrics_{period_name.lower().replace('-', '_')}-{generation}.parquet"
+
+
+def key_paths(state, ingest_dir=INGEST_DIR, segments_only=False):
+    """Committed sale-key files: the base's, then one per delta segment"""
+    names = [] if segments_only else list(state['key_files'])
+    names += [f'{segment}.parquet' for segment in state['segments']]
+    return [Path(ingest_dir) / 'sale_keys' / name for name in names]
+
+
+def market_sketch(prices):
+    """One centroid list over every price in a SketchStore, for the all-time 95th percentile"""
+    return compress(prices.means, prices.weights, prices.compression)
+
+
+def load_sketches(ingest_dir, kind, base, segments):
+    """Base sketches of one kind ('price' or 'distance') with every committed segment merged in"""
+    ingest_dir = Path(ingest_dir)
+    store = SketchStore.load(ingest_dir / f'{kind}_sketches-{base}.parquet')
+    if segments:
+        frame = pd.concat([
+            pd.read_parquet(ingest_dir / 'segments' / f'{kind}-{segment}.parquet') for segment in segments
+        ], ignore_index=True)
+        store = store.merge(SketchStore(compress_groups(frame, store.compression), store.compression))
+    return store
+
+
+def load_state(ingest_dir=INGEST_DIR):
+    ingest_dir = Path(ingest_dir)
+    with open(ingest_dir / 'state.json') as f:
+        state = json.load(f)
+    if 'base' not in state:
+        raise RuntimeError('Ingest state predates segmented storage; rebuild it with --init')
+    state['latest_date'] = pd.Timestamp(state['latest_date'])
+    state['market_prices'] = tuple(np.array(values, dtype=float) for values in state['market_prices'])
+    state['prices'] = load_sketches(ingest_dir, 'price', state['base'], state['segments'])
+    state['distances'] = load_sketches(ingest_dir, 'distance', state['base'], state['segments'])
+    state['metrics'] = {
+        name: pd.read_parquet(metrics_path(ingest_dir, name, state['generation']))
+        for name in analysis_windows(state['latest_date'])
+    }
+    return state
+
+
+def write_metrics(state, ingest_dir=INGEST_DIR):
+    for name, metrics in state['metrics'].items():
+        metrics.to_parquet(metrics_path(ingest_dir, name, state['generation']), index=False)
+
+
+def commit_state(state, ingest_dir=INGEST_DIR):
+    """
+    Replace state.json, which makes the files written for `state` current
+
+    Then clears the pending-delta marker and deletes every state file that
+    state.json no longer names.
+    """
+    ingest_dir = Path(ingest_dir)
+    tmp_path = ingest_dir / 'state.json.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({
+            'latest_date': state['latest_date'].isoformat(),
+            'suburbs': state['suburbs'],
+            'generation': state['generation'],
+            'base': state['base'],
+            'segments': state['segments'],
+            'key_files': state['key_files'],
+            'market_prices': [values.tolist() for values in state['market_prices']]
+        }, f, indent=2)
+    tmp_path.replace(ingest_dir / 'state.json')
+    (ingest_dir / 'pending.json').unlink(missing_ok=True)
+
+    current = set(key_paths(state, ingest_dir))
+    current |= {metrics_path(ingest_dir, name, state['generation']) for name in state['metrics']}
+    for kind in ('price', 'distance'):
+        current.add(ingest_dir / f"{kind}_sketches-{state['base']}.parquet")
+        current |= {ingest_dir / 'segments' / f'{kind}-{segment}.parquet' for segment in state['segments']}
+    for directory in (ingest_dir, ingest_dir / 'segments', ingest_dir / 'sale_keys'):
+        for path in directory.glob('*.parquet'):
+            if path not in current:
+                path.unlink()
+
+
+def save_state(state, ingest_dir=INGEST_DIR):
+    """
+    Write a fully built state (from `initialise` or streaming) as a new base and commit it
+
+    The builder writes its sale keys under sale_keys/ beforehand and lists
+    them in state['key_files'].
+    """
+    ingest_dir = Path(ingest_dir)
+    ingest_dir.mkdir(parents=True, exist_ok=True)
+    state['base'], state['segments'] = state['generation'], []
+    state['prices'].save(ingest_dir / f"price_sketches-{state['base']}.parquet")
+    state['distances'].save(ingest_dir / f"distance_sketches-{state['base']}.parquet")
+    write_metrics(state, ingest_dir)
+    commit_state(state, ingest_dir)
+
+
+def warn_thin_windows(period_name, metrics, min_sales=MIN_WINDOW_SALES):
+    """Print the suburbs whose period or previous window has fewer than min_sales sales"""
+    thin = metrics[(metrics['period_transactions'] < min_sales) | (metrics['previous_transactions'] < min_sales)]
+    if len(thin) == 0:
+        return
+    listed = ', '.join(
+        f"{row.suburb} ({row.period_transactions}/{row.previous_transactions})"
+        for row in thin.itertuples()
+    )
+    print(f"⚠️  {period_name}: {len(thin)} suburbs have fewer than {min_sales} sales in the window "
+          f"or the one before (period/previous); their month-grained scores may differ markedly "
+          f"from comprehensive_analysis.py: {listed}")
+
+
+def write_outputs(state, output_dir='.'):
+    """Score the persisted metrics and rewrite investment_scores_*.csv, the comparison and the snapshot"""
+    max_price = sketch_quantile(*state['market_prices'], 0.95)
+    all_results = {}
+    for period_name, metrics in state['metrics'].items():
+        warn_thin_windows(period_name, metrics)
+        results = score_metrics(metrics, max_price)
+        results['period'] = period_name
+        all_results[period_name] = results[PERIOD_OUTPUT_COLUMNS].sort_values('total_score', ascending=False)
+
+        filename = f"investment_scores_{period_name.lower().replace('-', '_')}.csv"
+        all_results[period_name].to_csv(Path(output_dir) / filename, index=False)
+        print(f"✅ Exported: {filename}")
+
+    comparison_df = period_comparison(all_results, state['suburbs'])
+    comparison_df.to_csv(Path(output_dir) / 'multi_period_comparison.csv', index=False)
+    print(f"✅ Exported: multi_period_comparison.csv")
+
+    write_score_snapshot(all_results, comparison_df, output_dir)
+    print(f"✅ Exported: {SNAPSHOT_FILENAME}, {COMPARISON_SNAPSHOT_FILENAME}, {COMPONENT_WEIGHTS_FILENAME}")
+
+
+def initialise(ingest_dir=INGEST_DIR):
+    """Build ingest state from the full enriched history"""
+    df_trans = load_enriched_transactions(columns=SCORING_COLUMNS)
+    geocoded = df_trans[df_trans['latitude'].notna() & (df_trans['sale_date'] >= DISTANCE_SINCE)]
+    df_with_coords = df_trans.merge(cached_road_distances(geocoded), on=ADDRESS_KEY, how='left')
+
+    generation = new_generation()
+    key_file = f'{generation}-0.parquet'
+    write_sale_keys(sale_keys(df_trans), Path(ingest_dir) / 'sale_keys' / key_file)
+
+    latest_date = df_trans['sale_date'].max()
+    suburbs = df_trans['suburb'].astype(str).unique().tolist()
+    prices = SketchStore.build(df_with_coords, 'price')
+    distances = SketchStore.build(df_with_coords, DISTANCE_COLUMN)
+    state = {
+        'latest_date': latest_date,
+        'suburbs': suburbs,
+        'generation': generation,
+        'key_files': [key_file],
+        'market_prices': market_sketch(prices),
+        'prices': prices,
+        'distances': distances,
+        'metrics': {
+            name: sketch_window_metrics(prices, distances, suburbs, start, previous_start, latest_date)
+            for name, (start, previous_start) in analysis_windows(latest_date).items()
+        }
+    }
+    save_state(state, ingest_dir)
+    return state
+
+
+def apply_delta(delta_path, ingest_dir=INGEST_DIR, output_dir='.'):
+    """Merge the unseen sales of one delta file into the ingest state and rewrite the score outputs"""
+    ingest_dir = Path(ingest_dir)
+    state = load_state(ingest_dir)
+    delta_id = file_hash(delta_path)[:12]
+    pending_path = ingest_dir / 'pending.json'
+    if pending_path.exists():
+        with open(pending_path) as f:
+            pending = json.load(f)
+        if pending['delta'] != delta_id:
+            raise RuntimeError(f"{pending['path']} was interrupted part-way; apply it again before other deltas")
+
+    table, delta = read_delta(delta_path)
+    delta['row'] = np.arange(len(delta))
+    delta = unseen_sales(delta, key_paths(state, ingest_dir))
+    if len(delta) == 0:
+        print(f"⏭️  {delta_path}: no sales that are not already in the state")
+        return state
+
+    with open(pending_path, 'w') as f:
+        json.dump({'delta': delta_id, 'path': str(delta_path)}, f)
+    new_rows = table.take(pa.array(delta['row'].to_numpy()))
+    delta = locate_sales(delta.drop(columns='row'))
+    print(f"   Delta: {len(delta):,} new priced sales across {delta['suburb'].nunique():,} suburbs "
+          f"({table.num_rows - len(delta):,} already seen)")
+
+    price_segment = SketchStore.build(delta, 'price')
+    distance_segment = SketchStore.build(delta, DISTANCE_COLUMN)
+    state['prices'] = state['prices'].merge(price_segment)
+    state['distances'] = state['distances'].merge(distance_segment)
+    market_means, market_weights = state['market_prices']
+    state['market_prices'] = compress(
+        np.concatenate([market_means, delta['price'].to_numpy(dtype=float)]),
+        np.concatenate([market_weights, np.ones(len(delta))]),
+        state['prices'].compression
+    )
+    new_suburbs = [s for s in delta['suburb'].unique() if s not in set(state['suburbs'])]
+    state['suburbs'] = state['suburbs'] + new_suburbs
+
+    latest_date = max(state['latest_date'], delta['sale_date'].max())
+    if latest_date > state['latest_date']:
+        # Every window moved: recompute all suburbs, from sketches only
+        touched = state['suburbs']
+    else:
+        touched = delta['suburb'].unique().tolist()
+    state['latest_date'] = latest_date
+
+    # Keep rows in first-seen suburb order, as the full pipeline does
+    order = {suburb: i for i, suburb in enumerate(state['suburbs'])}
+    for name, (start, previous_start) in analysis_windows(latest_date).items():
+        updated = sketch_window_metrics(
+            state['prices'], state['distances'], touched, start, previous_start, latest_date
+        )
+        kept = state['metrics'][name]
+        kept = kept[~kept['suburb'].isin(touched)]
+        metrics = pd.concat([kept, updated], ignore_index=True)
+        state['metrics'][name] = metrics.sort_values(
+            'suburb', key=lambda s: s.map(order), kind='stable'
+        ).reset_index(drop=True)
+    print(f"   Recomputed windows for {len(touched):,} suburbs")
+
+    # Every file below is named after the delta and ignored until state.json names it
+    keys = sale_keys(delta)
+    state['generation'] = delta_id
+    if len(state['segments']) + 1 >= MAX_SEGMENTS:
+        # Fold the segments into a new base: the whole store is rewritten once per MAX_SEGMENTS deltas
+        keys = sale_keys(pd.concat(
+            [pd.read_parquet(path) for path in key_paths(state, ingest_dir, segments_only=True)] + [keys],
+            ignore_index=True
+        ))
+        state['prices'].save(ingest_dir / f'price_sketches-{delta_id}.parquet')
+        state['distances'].save(ingest_dir / f'distance_sketches-{delta_id}.parquet')
+        state['base'], state['segments'] = delta_id, []
+        state['key_files'] = state['key_files'] + [f'{delta_id}.parquet']
+        print(f"   Folded segments into a new base ({len(state['prices']):,} price centroids)")
+    else:
+        price_segment.save(ingest_dir / 'segments' / f'price-{delta_id}.parquet')
+        distance_segment.save(ingest_dir / 'segments' / f'distance-{delta_id}.parquet')
+        state['segments'] = state['segments'] + [delta_id]
+    write_sale_keys(keys, ingest_dir / 'sale_keys' / f'{delta_id}.parquet')
+    write_metrics(state, ingest_dir)
+    if os.path.isdir(DATASET_PATH):
+        # Keep the partitioned store complete for the next full rebuild; a rerun replaces these files
+        write_partitions(new_rows, append=True, batch_id=delta_id)
+
+    commit_state(state, ingest_dir)
+    write_outputs(state, output_dir)
+    return state
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        print(__doc__)
+        sys.exit(1)
+
+    if sys.argv[1] == '--init':
+        state = initialise()
+        print(f"✅ Ingest state built: {len(state['suburbs']):,} suburbs, "
+              f"{len(state['prices']):,} price centroids, latest sale {state['latest_date'].date()}")
+        write_outputs(state)
+    else:
+        apply_delta(sys.argv[1])
@@ -0,0 +1,111 @@
+"""
+Parallel Geometry Stages
+Opt-in process-pool execution for road distances and the cadastre parcel join
+
+The point set is split into contiguous chunks and fanned out across worker
+processes. Coordinates and results live in shared memory, so workers read
+their slice and write their answers in place: no GeoDataFrames are pickled
+and results land at fixed offsets, which keeps the output identical for any
+worker count. Each worker loads the road or parcel layer (and builds its
+spatial index) once, in its initializer.
+
+Enable with GEOMETRY_WORKERS=<n> in the environment or by passing `workers`.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from road_proximity import MAJOR_ROAD_CLASSES
+
+DEFAULT_WORKERS = int(os.environ.get('GEOMETRY_WORKERS', 1))
+DEFAULT_CHUNK_SIZE = 50_000
+
+_worker = {}
+
+
+def share_array(array):
+    """Copy an array into a new shared memory block"""
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+    return shm
+
+
+def release_array(shm):
+    """Close and unlink a shared memory block, which a worker that failed to attach may have unlinked already"""
+    shm.close()
+    try:
+        shm.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _init_worker(kind, source_path, coords_name, out_name, n, out_dtype, options):
+    coords_shm = shared_memory.SharedMemory(name=coords_name)
+    out_shm = shared_memory.SharedMemory(name=out_name)
+    _worker['shm'] = (coords_shm, out_shm)  # keep the mappings alive
+    _worker['coords'] = np.ndarray((n, 2), dtype='float64', buffer=coords_shm.buf)
+    _worker['out'] = np.ndarray((n,), dtype=out_dtype, buffer=out_shm.buf)
+
+    if kind == 'roads':
+        from road_proximity import load_major_roads, nearest_road_distance
+        major_roads = load_major_roads(source_path, options['classes'])
+        max_distance_m = options['max_distance_m']
+        _worker['fn'] = lambda lon, lat: nearest_road_distance(lon, lat, major_roads, max_distance_m)
+    elif kind == 'parcels':
+        from parcel_enrichment import assign_parcels, load_parcels
+        parcels = load_parcels(source_path)
+        _worker['fn'] = lambda lon, lat: assign_parcels(lon, lat, parcels)
+    else:
+        raise ValueError(f'Unknown geometry stage: {kind}')
+
+
+def _run_chunk(start, end):
+    coords = _worker['coords']
+    _worker['out'][start:end] = _worker['fn'](coords[start:end, 0], coords[start:end, 1])
+    return start, end
+
+
+def run_parallel(kind, longitude, latitude, source_path, workers=None,
+                 chunk_size=DEFAULT_CHUNK_SIZE, **options):
+    """
+    Run a geometry stage ('roads' or 'parcels') over all points across a process pool
+
+    Returns the same array the single-process function would: distances in
+    metres for 'roads', parcel ids for 'parcels'.
+    """
+    workers = workers or DEFAULT_WORKERS
+    coords = np.column_stack([
+        np.asarray(longitude, dtype='float64'), np.asarray(latitude, dtype='float64')
+    ])
+    n = len(coords)
+    out_dtype = 'float64' if kind == 'roads' else 'int64'
+
+    coords_shm = share_array(coords)
+    out_shm = share_array(np.zeros(n, dtype=out_dtype))
+    try:
+        chunks = [(start, min(start + chunk_size, n)) for start in range(0, n, chunk_size)]
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(kind, str(source_path), coords_shm.name, out_shm.name, n, out_dtype, options)
+        ) as pool:
+            for future in [pool.submit(_run_chunk, start, end) for start, end in chunks]:
+                future.result()
+        return np.ndarray((n,), dtype=out_dtype, buffer=out_shm.buf).copy()
+    finally:
+        for shm in (coords_shm, out_shm):
+            release_array(shm)
+
+
+def parallel_road_distances(longitude, latitude, roads_path='roads.gpkg', workers=None,
+                            chunk_size=DEFAULT_CHUNK_SIZE, max_distance_m=None, classes=None):
+    """Parallel `road_proximity.nearest_road_distance`"""
+    return run_parallel('roads', longitude, latitude, roads_path, workers, chunk_size,
+                        max_distance_m=max_distance_m, classes=list(classes or MAJOR_ROAD_CLASSES))
+
+
+def parallel_parcel_ids(longitude, latitude, cadastre_path='cadastre.gpkg', workers=None,
+                        chunk_size=DEFAULT_CHUNK_SIZE):
+    """Parallel `parcel_enrichment.assign_parcels`"""
+    return run_parallel('parcels', longitude, latitude, cadastre_path, workers, chunk_size)
@@ -0,0 +1,124 @@
+"""
+Parallel Scoring Executor
+Shards (suburb, period) window work units across a process pool
+
+Window boundaries for every suburb and period come from one vectorized
+search in the parent (`period_windows.window_bounds`). The medians over those
+slices are the per-unit work; units with sales in the period are split into
+contiguous chunks and fanned out across worker processes. Sorted prices,
+distances and bounds live in shared memory and every unit writes its medians
+at a fixed row, so nothing is pickled per task and the result is identical
+(and identically ordered) for any worker count. Component scoring stays in
+the parent: it is a handful of array operations over the finished metrics.
+
+Enable with SCORING_WORKERS=<n>. SCORING_MEMORY_MB=<mb> sets RLIMIT_AS in
+each worker: a cap on virtual address space, not resident memory. Everything
+the worker maps counts against it (the interpreter, numpy, the shared arrays,
+allocator reservations), so set it well above the expected RSS. The cap
+does not shrink a worker's footprint, it makes the worker fail. A cap too
+small to map the shared arrays kills each worker at start-up, and the run
+raises BrokenProcessPool naming the budget. Past start-up, an allocation
+over the cap raises MemoryError inside the task. Chunk size does not bound
+it either, since a chunk only adds one slice copy at a time on top of the
+shared arrays. Where the limit cannot be applied (macOS, which does not
+enforce RLIMIT_AS, or Windows, which has no `resource` module) a warning is
+issued and the worker runs uncapped.
+"""
+
+import os
+import sys
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+import numpy as np
+from parallel_geometry import release_array, share_array
+from period_windows import metrics_frames, multi_period_metrics, unit_medians, window_bounds
+
+DEFAULT_WORKERS = int(os.environ.get('SCORING_WORKERS', 1))
+DEFAULT_MEMORY_MB = int(os.environ.get('SCORING_MEMORY_MB', 0)) or None
+DEFAULT_CHUNK_UNITS = 256
+
+_worker = {}
+
+
+def _set_memory_limit(memory_limit_mb):
+    """Cap this process's virtual address space (see the module docstring), warning where unsupported"""
+    if sys.platform == 'darwin':
+        warnings.warn('SCORING_MEMORY_MB is ignored on macOS, which does not enforce RLIMIT_AS')
+        return
+    try:
+        import resource
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError) as e:
+        warnings.warn(f'SCORING_MEMORY_MB not applied: {e}')
+
+
+def _init_worker(specs, memory_limit_mb):
+    if memory_limit_mb:
+        _set_memory_limit(memory_limit_mb)
+
+    _worker['shm'] = []  # keep the mappings alive
+    for key, (name, shape, dtype) in specs.items():
+        shm = shared_memory.SharedMemory(name=name)
+        _worker['shm'].append(shm)
+        _worker[key] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _run_units(start, end):
+    _worker['out'][start:end] = unit_medians(
+        _worker['prices'], _worker.get('distances'), _worker['bounds'][start:end]
+    )
+    return start, end
+
+
+def parallel_window_metrics(store, windows, end, workers=None, chunk_size=DEFAULT_CHUNK_UNITS,
+                            memory_limit_mb=None):
+    """
+    `period_windows.multi_period_metrics` with the medians computed across a process pool
+
+    Falls back to the single-process path when one worker is configured.
+    """
+    workers = workers or DEFAULT_WORKERS
+    memory_limit_mb = memory_limit_mb or DEFAULT_MEMORY_MB
+    if workers <= 1:
+        return multi_period_metrics(store, windows, end)
+
+    names, bounds = window_bounds(store, windows, end)
+    units = bounds.reshape(-1, 6)
+    # Only units with sales in the period produce a metrics row
+    active = np.flatnonzero(units[:, 1] > units[:, 0])
+
+    arrays = {
+        'prices': store.values['price'],
+        'bounds': np.ascontiguousarray(units[active], dtype='int64'),
+        'out': np.full((len(active), 3), np.nan)
+    }
+    if 'distance_to_major_road_m' in store.values:
+        arrays['distances'] = store.values['distance_to_major_road_m']
+
+    shms = {key: share_array(np.ascontiguousarray(array)) for key, array in arrays.items()}
+    try:
+        specs = {key: (shms[key].name, array.shape, array.dtype.str) for key, array in arrays.items()}
+        chunks = [(start, min(start + chunk_size, len(active))) for start in range(0, len(active), chunk_size)]
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(specs, memory_limit_mb)
+        ) as pool:
+            for future in [pool.submit(_run_units, start, end) for start, end in chunks]:
+                future.result()
+        active_medians = np.ndarray(arrays['out'].shape, dtype='float64', buffer=shms['out'].buf).copy()
+    except BrokenProcessPool as e:
+        if memory_limit_mb:
+            raise BrokenProcessPool(
+                f'{e} Workers were capped at SCORING_MEMORY_MB={memory_limit_mb} MB of address space; '
+                f'a worker that cannot map the interpreter and shared arrays under that cap dies at start-up'
+            ) from e
+        raise
+    finally:
+        for shm in shms.values():
+            release_array(shm)
+
+    medians = np.full((len(units), 3), np.nan)
+    medians[active] = active_medians
+    return metrics_frames(store, names, bounds, medians.reshape(len(names), -1, 3))
@@ -0,0 +1,167 @@
+"""
+Parcel Enrichment Stage
+Assigns every GNAF address point to its cadastre parcel with a bulk STRtree join
+
+Parcels are indexed once and all points are matched in a single
+point-in-polygon query (the tree tests candidates with prepared geometries).
+Each parcel contributes area, frontage and shape metrics as scoring features.
+
+Both the address -> parcel mapping and the parcel attribute table are cached
+as Parquet, keyed on a content hash of `cadastre.gpkg`, so reruns only join
+addresses that were not seen before and skip reading the cadastre entirely
+when nothing is missing.
+"""
+
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+from distance_cache import ADDRESS_KEY, CACHE_DIR, file_hash
+from road_proximity import METRIC_CRS
+from parallel_geometry import DEFAULT_WORKERS, parallel_parcel_ids
+
+CADASTRE_PATH = 'cadastre.gpkg'
+PARCEL_COLUMNS = [
+    'parcel_id', 'parcel_area_m2', 'parcel_perimeter_m', 'parcel_frontage_m',
+    'parcel_depth_m', 'parcel_compactness'
+]
+
+
+def cadastre_key(cadastre_path=CADASTRE_PATH):
+    """Cache key for a cadastre layer version"""
+    return file_hash(cadastre_path)[:16]
+
+
+def load_parcels(cadastre_path=CADASTRE_PATH, crs=METRIC_CRS):
+    """Read cadastre polygons into a metric CRS with `parcel_id` taken from the layer fid"""
+    parcels = gpd.read_file(cadastre_path, fid_as_index=True).to_crs(crs)
+    parcels['parcel_id'] = parcels.index.astype('int64')
+    return parcels.reset_index(drop=True)
+
+
+def parcel_attributes(parcels):
+    """
+    Area, perimeter, frontage, depth and compactness for every parcel
+
+    Frontage and depth are the short and long sides of the parcel's minimum
+    rotated rectangle; compactness is 4*pi*area / perimeter^2 (1 = circle).
+    """
+    geoms = parcels.geometry.values
+    area = shapely.area(geoms)
+    perimeter = shapely.length(geoms)
+
+    envelopes = shapely.oriented_envelope(geoms)
+    coords, owner = shapely.get_coordinates(envelopes, return_index=True)
+    counts = np.bincount(owner, minlength=len(geoms))
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    rectangle = counts >= 4  # degenerate envelopes collapse to lines or points
+
+    side_a = np.full(len(geoms), np.nan)
+    side_b = np.full(len(geoms), np.nan)
+    first = starts[rectangle]
+    side_a[rectangle] = np.hypot(*(coords[first + 1] - coords[first]).T)
+    side_b[rectangle] = np.hypot(*(coords[first + 2] - coords[first + 1]).T)
+
+    return pd.DataFrame({
+        'parcel_id': parcels['parcel_id'].values,
+        'parcel_area_m2': area,
+        'parcel_perimeter_m': perimeter,
+        'parcel_frontage_m': np.fmin(side_a, side_b),
+        'parcel_depth_m': np.fmax(side_a, side_b),
+        'parcel_compactness': np.where(perimeter > 0, 4 * np.pi * area / perimeter ** 2, np.nan)
+    })
+
+
+def assign_parcels(longitude, latitude, parcels):
+    """parcel_id containing each lon/lat point (-1 where no parcel contains it)"""
+    longitude = np.asarray(longitude, dtype=float)
+    latitude = np.asarray(latitude, dtype=float)
+    parcel_ids = np.full(len(longitude), -1, dtype='int64')
+
+    valid = ~(np.isnan(longitude) | np.isnan(latitude))
+    if len(parcels) == 0 or not valid.any():
+        return parcel_ids
+
+    points = gpd.GeoSeries(
+        gpd.points_from_xy(longitude[valid], latitude[valid]), crs='EPSG:4326'
+    ).to_crs(parcels.crs)
+
+    point_idx, parcel_idx = parcels.sindex.query(points.values, predicate='within')
+    # A point on a shared boundary can fall in two parcels; keep the first match
+    point_idx, first = np.unique(point_idx, return_index=True)
+
+    valid_ids = np.full(valid.sum(), -1, dtype='int64')
+    valid_ids[point_idx] = parcels['parcel_id'].values[parcel_idx[first]]
+    parcel_ids[valid] = valid_ids
+    return parcel_ids
+
+
+def _write_cache(frame, path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.tmp')
+    frame.to_parquet(tmp_path, index=False)
+    tmp_path.replace(path)
+
+
+def _drop_stale(cache_dir, prefix, keep):
+    for stale in Path(cache_dir).glob(f'{prefix}_*.parquet'):
+        if stale not in keep:
+            stale.unlink()
+
+
+def cached_parcel_attributes(points, cadastre_path=CADASTRE_PATH, cache_dir=CACHE_DIR, workers=None):
+    """
+    Parcel attributes for every address point in `points`
+
+    `points` needs gnaf_pid, latitude and longitude columns. Returns one row
+    per distinct address point with the PARCEL_COLUMNS (parcel_id -1 and NaN
+    metrics when the point is outside every parcel). New addresses are
+    joined across `workers` processes when more than one is configured.
+    """
+    key = cadastre_key(cadastre_path)
+    map_path = Path(cache_dir) / f'parcel_map_{key}.parquet'
+    attributes_path = Path(cache_dir) / f'parcel_attributes_{key}.parquet'
+
+    if map_path.exists():
+        mapping = pd.read_parquet(map_path)
+    else:
+        mapping = pd.DataFrame({
+            'gnaf_pid': pd.Series(dtype=object),
+            'latitude': pd.Series(dtype=float),
+            'longitude': pd.Series(dtype=float),
+            'parcel_id': pd.Series(dtype='int64')
+        })
+
+    addresses = points[ADDRESS_KEY].dropna(subset=['latitude', 'longitude']).drop_duplicates()
+    lookup = addresses.merge(mapping, on=ADDRESS_KEY, how='left', indicator=True)
+    missing = lookup[lookup['_merge'] == 'left_only'][ADDRESS_KEY]
+
+    parallel = (workers or DEFAULT_WORKERS) > 1
+    parcels = None
+    if (len(missing) > 0 and not parallel) or not attributes_path.exists():
+        parcels = load_parcels(cadastre_path)
+
+    if len(missing) > 0:
+        print(f"   Parcel cache: {len(addresses) - len(missing):,} hits, {len(missing):,} to join")
+        missing = missing.copy()
+        if parallel:
+            missing['parcel_id'] = parallel_parcel_ids(
+                missing['longitude'], missing['latitude'], cadastre_path, workers
+            )
+        else:
+            missing['parcel_id'] = assign_parcels(missing['longitude'], missing['latitude'], parcels)
+        mapping = pd.concat([mapping, missing], ignore_index=True)
+        _write_cache(mapping, map_path)
+
+    if attributes_path.exists():
+        attributes = pd.read_parquet(attributes_path)
+    else:
+        attributes = parcel_attributes(parcels)
+        _write_cache(attributes, attributes_path)
+
+    _drop_stale(cache_dir, 'parcel_map', {map_path})
+    _drop_stale(cache_dir, 'parcel_attributes', {attributes_path})
+
+    matched = addresses.merge(mapping, on=ADDRESS_KEY, how='left')
+    return matched.merge(attributes, on='parcel_id', how='left')[ADDRESS_KEY + PARCEL_COLUMNS]
@@ -0,0 +1,144 @@
+"""
+Multi-Period Window Engine
+All scoring windows from one (suburb, sale_date) sort
+
+Transactions are sorted once by suburb then date, so every suburb is a
+contiguous run and every time window is a contiguous slice of that run.
+Window boundaries for all suburbs and all horizons are located with a single
+vectorized `searchsorted` over a composite (suburb, date) key; counts are
+slice lengths and medians are taken over the slices directly. Adding a
+horizon (2-year, 7-year, ...) adds two boundaries, not another table scan.
+"""
+
+import warnings
+import numpy as np
+import pandas as pd
+
+
+class SortedTransactions:
+    """Transactions sorted by (suburb, sale_date) with per-suburb offsets"""
+
+    def __init__(self, df, value_columns=('price', 'distance_to_major_road_m')):
+        codes, suburbs = pd.factorize(df['suburb'], sort=False)
+        seconds = df['sale_date'].values.astype('datetime64[s]').astype('int64')
+
+        order = np.lexsort((seconds, codes))
+        self.suburbs = np.asarray(suburbs, dtype=object)
+        self.codes = codes[order]
+        self.seconds = seconds[order]
+        self.values = {
+            column: df[column].to_numpy(dtype=float)[order]
+            for column in value_columns if column in df
+        }
+
+        self.min_second = int(self.seconds.min()) if len(self.seconds) else 0
+        # Width of one suburb's key range; -1 and span - 1 stay inside it
+        self.span = int(self.seconds.max()) - self.min_second + 2 if len(self.seconds) else 2
+        self.keys = self.codes * self.span + (self.seconds - self.min_second)
+        self.offsets = np.searchsorted(self.codes, np.arange(len(self.suburbs) + 1))
+
+    def __len__(self):
+        return len(self.codes)
+
+    def _offset(self, timestamps):
+        seconds = np.asarray(
+            pd.DatetimeIndex(np.atleast_1d(timestamps)).values.astype('datetime64[s]').astype('int64')
+        )
+        return np.clip(seconds - self.min_second, -1, self.span - 1)
+
+    def boundaries(self, timestamps, side='left'):
+        """
+        Positions (suburbs x timestamps) splitting each suburb's run at each timestamp
+
+        side='left' gives the first sale at or after the timestamp,
+        side='right' the first sale strictly after it.
+        """
+        suburb_base = np.arange(len(self.suburbs))[:, None] * self.span
+        return np.searchsorted(self.keys, suburb_base + self._offset(timestamps)[None, :], side=side)
+
+    def slice_medians(self, column, lo, hi):
+        """Median of `column` over each [lo, hi) slice (NaN for empty slices, NaNs skipped)"""
+        return slice_medians(self.values[column], lo, hi)
+
+
+def slice_medians(values, lo, hi):
+    """Median of `values` over each [lo, hi) slice (NaN for empty slices, NaNs skipped)"""
+    medians = np.full(len(lo), np.nan)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        for i in np.flatnonzero(hi > lo):
+            medians[i] = np.nanmedian(values[lo[i]:hi[i]])
+    return medians
+
+
+def window_bounds(store, windows, end):
+    """
+    Slice bounds for every (period, suburb) unit
+
+    Returns (names, bounds) where bounds[i] is a (suburbs x 6) int array of
+    period lo/hi, previous lo/hi and distance lo/hi positions for period i.
+    Distances cover the period's sales, so an `end` before the latest sale
+    scores exactly as a store truncated at `end` would.
+    """
+    names = list(windows)
+    starts = [windows[name][0] for name in names]
+    previous_starts = [windows[name][1] for name in names]
+
+    # One vectorized search for every boundary of every horizon
+    left = store.boundaries(starts + previous_starts, side='left')
+    period_lo, previous_lo = left[:, :len(names)], left[:, len(names):]
+    period_hi = store.boundaries([end], side='right')[:, 0]
+
+    bounds = np.stack([
+        np.column_stack([period_lo[:, i], period_hi, previous_lo[:, i], period_lo[:, i],
+                         period_lo[:, i], period_hi])
+        for i in range(len(names))
+    ])
+    return names, bounds
+
+
+def unit_medians(prices, distances, bounds):
+    """(units x 3) period price, previous price and distance medians for a (units x 6) bounds array"""
+    return np.column_stack([
+        slice_medians(prices, bounds[:, 0], bounds[:, 1]),
+        slice_medians(prices, bounds[:, 2], bounds[:, 3]),
+        slice_medians(distances, bounds[:, 4], bounds[:, 5])
+        if distances is not None else np.full(len(bounds), np.nan)
+    ])
+
+
+def metrics_frames(store, names, bounds, medians, rows=None):
+    """{period name: metrics frame} from per-unit bounds and medians (of store suburbs `rows`)"""
+    suburbs = store.suburbs if rows is None else store.suburbs[rows]
+    results = {}
+    for i, name in enumerate(names):
+        b, m = bounds[i], medians[i]
+        metrics = pd.DataFrame({
+            'suburb': suburbs,
+            'period_transactions': b[:, 1] - b[:, 0],
+            'period_median_price': m[:, 0],
+            'previous_transactions': b[:, 3] - b[:, 2],
+            'previous_median_price': m[:, 1],
+            'avg_distance_to_road_m': m[:, 2]
+        })
+        results[name] = metrics[metrics['period_transactions'] > 0].reset_index(drop=True)
+    return results
+
+
+def multi_period_metrics(store, windows, end, rows=None):
+    """
+    Window metrics for every horizon in one pass
+
+    `windows` maps a period name to (period_start, previous_start). The
+    period covers [period_start, end] and the comparison covers
+    [previous_start, period_start). `rows` (positions in `store.suburbs`)
+    restricts the medians to those suburbs. Returns {period name: metrics
+    frame} in the `scoring.suburb_window_metrics` layout.
+    """
+    names, bounds = window_bounds(store, windows, end)
+    if rows is not None:
+        bounds = bounds[:, rows]
+    medians = unit_medians(
+        store.values['price'], store.values.get('distance_to_major_road_m'), bounds.reshape(-1, 6)
+    ).reshape(len(names), -1, 3)
+    return metrics_frames(store, names, bounds, medians, rows)
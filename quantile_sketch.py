@@ -0,0 +1,259 @@
+"""
+Price Quantile Sketches
+One mergeable t-digest per (suburb, month) for median queries over any date range
+
+A sketch is a list of (mean, weight) centroids sorted by mean. Centroids are
+kept small near the tails and allowed to grow towards the median, bounded by
+the t-digest k1 scale function, so a sketch holds at most ~`compression`
+centroids however many sales it summarises. Merging is concatenate-and-compress,
+so the median of any month range is a merge of O(months) small sketches
+instead of a scan over raw rows.
+
+Error: a window whose merged months hold at most `compression` centroids is
+exact (one centroid per sale), so medians of thin windows match
+`Series.median()`. Past that, every centroid covers at most one k1 unit,
+which is 2*pi*sqrt(q(1-q))/compression of the sales it was built from at
+quantile q, widest at the median: pi/compression (about 3% of the sales at
+the default 100). Centroids are never split when merged, so a merged
+window's median lies within about pi/compression of its sales in rank of
+the exact median. The bound is on rank, not price; the price error depends
+on how spread the prices are around the median.
+"""
+
+import math
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from distance_cache import CACHE_DIR
+
+DEFAULT_COMPRESSION = 100
+SKETCH_PATH = CACHE_DIR / 'price_sketches.parquet'
+SKETCH_COLUMNS = ['suburb', 'month', 'mean', 'weight']
+
+
+def month_number(dates):
+    """Months since year 0 (year * 12 + month - 1) for each date"""
+    dates = pd.DatetimeIndex(np.atleast_1d(dates))
+    return np.asarray(dates.year * 12 + dates.month - 1, dtype='int64')
+
+
+def compress(means, weights, compression=DEFAULT_COMPRESSION):
+    """Merge adjacent centroids while each stays within one unit of the k1 scale"""
+    order = np.argsort(means, kind='stable')
+    means = np.asarray(means, dtype=float)[order]
+    weights = np.asarray(weights, dtype=float)[order]
+    if len(means) <= compression:
+        return means, weights
+
+    total = weights.sum()
+
+    def k(q):
+        return compression / (2 * math.pi) * math.asin(min(1.0, max(-1.0, 2 * q - 1)))
+
+    out_means, out_weights = [], []
+    cumulative = 0.0
+    limit = k(0.0) + 1
+    mean, weight = means[0], weights[0]
+    for m, w in zip(means[1:].tolist(), weights[1:].tolist()):
+        if k((cumulative + weight + w) / total) <= limit:
+            weight += w
+            mean += (m - mean) * w / weight
+        else:
+            out_means.append(mean)
+            out_weights.append(weight)
+            cumulative += weight
+            limit = k(cumulative / total) + 1
+            mean, weight = m, w
+    out_means.append(mean)
+    out_weights.append(weight)
+    return np.array(out_means), np.array(out_weights)
+
+
+def sketch_quantile(means, weights, q):
+    """
+    Quantile q of a sorted centroid list
+
+    Each centroid is centred on the middle of the ranks it covers and ranks
+    are interpolated linearly, which reduces to `np.quantile` (and the pandas
+    median) when every weight is 1.
+    """
+    if len(means) == 0:
+        return np.nan
+    weights = np.asarray(weights, dtype=float)
+    centres = np.cumsum(weights) - (weights + 1) / 2
+    return float(np.interp(q * (weights.sum() - 1), centres, means))
+
+
+class SketchStore:
+    """Per-(suburb, month) price sketches sorted by suburb, month and centroid mean"""
+
+    def __init__(self, frame, compression=DEFAULT_COMPRESSION, grouped=False):
+        # grouped: each suburb's rows are already contiguous and sorted by month and mean
+        if not grouped:
+            frame = frame.sort_values(['suburb', 'month', 'mean'], kind='stable')
+        frame = frame.reset_index(drop=True)
+        self.frame = frame[SKETCH_COLUMNS]
+        self.compression = compression
+
+        self.months = month_number(frame['month'])
+        self.means = frame['mean'].to_numpy(dtype=float)
+        self.weights = frame['weight'].to_numpy(dtype=float)
+        codes, suburbs = pd.factorize(frame['suburb'], sort=False)
+        offsets = np.searchsorted(codes, np.arange(len(suburbs) + 1))
+        self.slices = {suburb: (offsets[i], offsets[i + 1]) for i, suburb in enumerate(suburbs)}
+
+    @classmethod
+    def build(cls, df, value_column='price', compression=DEFAULT_COMPRESSION):
+        """Sketch every (suburb, month) of a transactions frame"""
+        data = df[['suburb', 'sale_date', value_column]].dropna()
+        frame = pd.DataFrame({
+            'suburb': data['suburb'].astype(str).to_numpy(),
+            'month': data['sale_date'].dt.to_period('M').dt.to_timestamp().to_numpy(),
+            'mean': data[value_column].to_numpy(dtype=float),
+            'weight': 1.0
+        })
+        return cls(compress_groups(frame, compression), compression)
+
+    @classmethod
+    def load(cls, path=SKETCH_PATH):
+        table = pq.read_table(path)
+        metadata = table.schema.metadata or {}
+        compression = int(metadata.get(b'compression', DEFAULT_COMPRESSION))
+        return cls(table.to_pandas(), compression)
+
+    def save(self, path=SKETCH_PATH):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        table = pa.Table.from_pandas(self.frame, preserve_index=False)
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}), b'compression': str(self.compression).encode()
+        })
+        tmp_path = path.with_suffix('.tmp')
+        pq.write_table(table, tmp_path)
+        tmp_path.replace(path)
+
+    def __len__(self):
+        return len(self.frame)
+
+    def merge(self, other):
+        """
+        New store with `other`'s sketches merged into this one's
+
+        Only the suburbs in `other` are regrouped, and only their groups that
+        grow past `compression` are recompressed; every other suburb's rows
+        are carried over as contiguous blocks, so the work follows the size
+        of `other` plus one copy of this store's arrays.
+        """
+        replaced = {}
+        for suburb, (lo, hi) in other.slices.items():
+            rows = other.frame.iloc[lo:hi]
+            if suburb in self.slices:
+                old_lo, old_hi = self.slices[suburb]
+                rows = pd.concat([self.frame.iloc[old_lo:old_hi], rows], ignore_index=True)
+            replaced[suburb] = compress_groups(rows, self.compression).sort_values(['month', 'mean'], kind='stable')
+
+        pieces, position = [], 0
+        for lo, hi, suburb in sorted((*self.slices[suburb], suburb) for suburb in replaced if suburb in self.slices):
+            pieces += [self.frame.iloc[position:lo], replaced.pop(suburb)]
+            position = hi
+        pieces += [self.frame.iloc[position:]] + list(replaced.values())
+        return SketchStore(pd.concat(pieces, ignore_index=True), self.compression, grouped=True)
+
+    def merged(self, suburb, start, end):
+        """(means, weights) of one suburb's sketch over the months of [start, end]"""
+        first, last = month_number([start, end])
+        return self.merged_months(suburb, first, last)
+
+    def merged_months(self, suburb, first, last):
+        """(means, weights) of one suburb's sketch over month numbers first..last"""
+        if suburb not in self.slices:
+            return np.empty(0), np.empty(0)
+        lo, hi = self.slices[suburb]
+        months = self.months[lo:hi]
+        lo, hi = lo + np.searchsorted(months, first, 'left'), lo + np.searchsorted(months, last, 'right')
+        return compress(self.means[lo:hi], self.weights[lo:hi], self.compression)
+
+    def quantile(self, suburb, start, end, q=0.5):
+        means, weights = self.merged(suburb, start, end)
+        return sketch_quantile(means, weights, q)
+
+    def count(self, suburb, start, end):
+        return int(self.merged(suburb, start, end)[1].sum())
+
+    def overall_quantile(self, q):
+        """Quantile q across every suburb and month"""
+        means, weights = compress(self.means, self.weights, self.compression)
+        return sketch_quantile(means, weights, q)
+
+    def window_quantiles(self, start, end, q=0.5):
+        """Series of quantile q per suburb over [start, end] (suburbs without sales dropped)"""
+        values = {}
+        for suburb in self.slices:
+            means, weights = self.merged(suburb, start, end)
+            if len(means):
+                values[suburb] = sketch_quantile(means, weights, q)
+        return pd.Series(values, name=f'q{q:g}', dtype=float).rename_axis('suburb')
+
+
+class SketchAccumulator:
+    """
+    Per-(suburb, month) centroid lists that record batches are folded into
+
+    Folding a batch recompresses only the groups it touches, each capped at
+    `compression` centroids, so a batch costs time in proportion to its rows
+    and touched groups rather than to everything folded so far. `store`
+    builds the SketchStore once at the end.
+    """
+
+    def __init__(self, compression=DEFAULT_COMPRESSION):
+        self.compression = compression
+        self.groups = {}
+        self.centroids = 0
+
+    def add(self, df, value_column='price'):
+        """Fold the non-null `value_column` values of a transactions frame into their groups"""
+        data = df[['suburb', 'sale_date', value_column]].dropna()
+        keys = [data['suburb'].astype(str).to_numpy(),
+                data['sale_date'].dt.to_period('M').dt.to_timestamp().to_numpy()]
+        for key, values in data[value_column].astype(float).groupby(keys, sort=False):
+            means, weights = values.to_numpy(), np.ones(len(values))
+            if key in self.groups:
+                old_means, old_weights = self.groups[key]
+                self.centroids -= len(old_means)
+                means, weights = np.concatenate([old_means, means]), np.concatenate([old_weights, weights])
+            self.groups[key] = compress(means, weights, self.compression)
+            self.centroids += len(self.groups[key][0])
+
+    def __len__(self):
+        return self.centroids
+
+    def store(self):
+        """SketchStore of everything folded in"""
+        if not self.groups:
+            return SketchStore(pd.DataFrame({column: [] for column in SKETCH_COLUMNS}), self.compression)
+        keys = list(self.groups)
+        lengths = [len(self.groups[key][0]) for key in keys]
+        frame = pd.DataFrame({
+            'suburb': np.repeat(np.array([suburb for suburb, _ in keys], dtype=object), lengths),
+            'month': np.repeat(pd.DatetimeIndex([month for _, month in keys]).to_numpy(), lengths),
+            'mean': np.concatenate([self.groups[key][0] for key in keys]),
+            'weight': np.concatenate([self.groups[key][1] for key in keys])
+        })
+        return SketchStore(frame, self.compression)
+
+
+def compress_groups(frame, compression=DEFAULT_COMPRESSION):
+    """Compress every (suburb, month) group of a centroid frame that exceeds `compression`"""
+    sizes = frame.groupby(['suburb', 'month'], sort=False)['weight'].transform('size')
+    small = frame[sizes <= compression]
+    large = frame[sizes > compression]
+    if len(large) == 0:
+        return frame
+
+    parts = [small]
+    for (suburb, month), group in large.groupby(['suburb', 'month'], sort=False):
+        means, weights = compress(group['mean'], group['weight'], compression)
+        parts.append(pd.DataFrame({'suburb': suburb, 'month': month, 'mean': means, 'weight': weights}))
+    return pd.concat(parts, ignore_index=True)
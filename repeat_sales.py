@@ -0,0 +1,163 @@
+"""
+Repeat-Sales Price Index
+Per-suburb, per-period price index fitted with sparse least squares
+
+Consecutive sales of the same property (gnaf_pid) form a pair, and each pair
+says log(p2 / p1) = b[suburb, t2] - b[suburb, t1] + noise (Bailey-Muth-Nourse).
+Every suburb's index is one block of a single sparse design matrix, anchored
+at the suburb's first period, and the whole system is solved at once with
+`scipy.sparse.linalg.lsqr`, so growth compares the same properties over time
+rather than a changing mix of sales. No dense regression, no suburb loop.
+
+A suburb's index is only identified when its pairs chain every observed
+period back to the anchor. Where they split into separate chains (say
+2010-2012 and 2018-2020 with no pair bridging them) the relative level of
+the chains is arbitrary, so such suburbs are found with
+`scipy.sparse.csgraph.connected_components`, left out of the fit and given
+NaN index values; the scorers then use median growth for them.
+
+Used by the scorers when GROWTH_METHOD = 'repeat_sales'.
+"""
+
+import warnings
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+from scipy.sparse.linalg import lsqr
+
+# Pairs whose price moved more than 5x either way are treated as data errors
+# or changed properties (e.g. knock-down rebuilds)
+MAX_ABS_LOG_RETURN = np.log(5)
+DEFAULT_FREQ = 'Y'
+
+
+def sale_pairs(df, freq=DEFAULT_FREQ):
+    """Consecutive sales of each gnaf_pid in different periods: suburb, t1, t2, log_return"""
+    sales = df[['gnaf_pid', 'suburb', 'sale_date', 'price']].dropna()
+    sales = sales[sales['price'] > 0].sort_values(['gnaf_pid', 'sale_date'], kind='stable')
+
+    pid = sales['gnaf_pid'].astype(str).to_numpy()
+    period = sales['sale_date'].dt.to_period(freq).dt.to_timestamp().to_numpy()
+    log_price = np.log(sales['price'].to_numpy(dtype=float))
+    suburb = sales['suburb'].astype(str).to_numpy()
+
+    resale = (pid[1:] == pid[:-1]) & (period[1:] != period[:-1])
+    pairs = pd.DataFrame({
+        'suburb': suburb[1:][resale],
+        't1': period[:-1][resale],
+        't2': period[1:][resale],
+        'log_return': (log_price[1:] - log_price[:-1])[resale]
+    })
+    return pairs[pairs['log_return'].abs() <= MAX_ABS_LOG_RETURN].reset_index(drop=True)
+
+
+def disconnected_suburbs(column_1, column_2, n_suburbs, n_periods):
+    """
+    Boolean mask of suburbs whose pair graph has more than one component
+
+    Nodes are (suburb, period) cells (suburb * n_periods + period) and each
+    pair is an edge between its two cells. Pairs never cross suburbs, so a
+    suburb is fully chained exactly when all of its used cells share one
+    component label.
+    """
+    if len(column_1) == 0:
+        return np.zeros(n_suburbs, dtype=bool)
+    n_cells = n_suburbs * n_periods
+    edges = sparse.coo_matrix((np.ones(len(column_1)), (column_1, column_2)), shape=(n_cells, n_cells))
+    _, labels = connected_components(edges, directed=False)
+
+    cells = np.unique(np.concatenate([column_1, column_2]))
+    suburb_labels = np.unique(np.column_stack([cells // n_periods, labels[cells]]), axis=0)
+    return np.bincount(suburb_labels[:, 0], minlength=n_suburbs) > 1
+
+
+class RepeatSalesIndex:
+    """
+    Log price index per (suburb, period)
+
+    NaN where no pair reaches the period, and for every period of suburbs
+    whose pairs form disconnected chains (listed in `disconnected`).
+    """
+
+    def __init__(self, df, freq=DEFAULT_FREQ):
+        pairs = sale_pairs(df, freq)
+        self.freq = freq
+        self.n_pairs = len(pairs)
+
+        suburb_codes, self.suburbs = pd.factorize(pairs['suburb'], sort=True)
+        periods = pd.DatetimeIndex(np.union1d(pairs['t1'], pairs['t2']))
+        self.periods = periods
+        t1 = periods.get_indexer(pairs['t1'])
+        t2 = periods.get_indexer(pairs['t2'])
+
+        n_suburbs, n_periods = len(self.suburbs), len(periods)
+        column_1 = suburb_codes * n_periods + t1
+        column_2 = suburb_codes * n_periods + t2
+
+        # Unidentified suburbs drop out of the fit and keep NaN everywhere
+        disconnected = disconnected_suburbs(column_1, column_2, n_suburbs, n_periods)
+        self.disconnected = np.asarray(self.suburbs, dtype=object)[disconnected]
+        fitted = ~disconnected[suburb_codes]
+        pairs = pairs[fitted].reset_index(drop=True)
+        column_1, column_2 = column_1[fitted], column_2[fitted]
+
+        # Anchor every suburb at its first observed period (b = 0 there)
+        used = np.zeros(n_suburbs * n_periods, dtype=bool)
+        used[column_1] = used[column_2] = True
+        used_grid = used.reshape(n_suburbs, n_periods)
+        first = np.where(used_grid.any(axis=1), used_grid.argmax(axis=1), -1)
+        base = np.zeros_like(used)
+        base[np.flatnonzero(first >= 0) * n_periods + first[first >= 0]] = True
+
+        free = used & ~base
+        compact = np.full(len(used), -1)
+        compact[free] = np.arange(free.sum())
+
+        rows = np.concatenate([np.arange(len(pairs)), np.arange(len(pairs))])
+        columns = np.concatenate([compact[column_2], compact[column_1]])
+        values = np.concatenate([np.ones(len(pairs)), -np.ones(len(pairs))])
+        keep = columns >= 0
+        design = sparse.csr_matrix(
+            (values[keep], (rows[keep], columns[keep])), shape=(len(pairs), int(free.sum()))
+        )
+
+        solution = np.empty(0)
+        if design.shape[1] > 0:
+            solution = lsqr(design, pairs['log_return'].to_numpy(), atol=1e-10, btol=1e-10)[0]
+        log_index = np.full(len(used), np.nan)
+        log_index[base] = 0.0
+        log_index[free] = solution
+        self.log_index = log_index.reshape(n_suburbs, n_periods)
+
+    def frame(self):
+        """Long frame: suburb, period, log_index, index (base period = 100)"""
+        grid = pd.DataFrame(self.log_index, index=pd.Index(self.suburbs, name='suburb'),
+                            columns=pd.Index(self.periods, name='period'))
+        long = grid.stack().rename('log_index').reset_index()
+        long['index'] = 100 * np.exp(long['log_index'])
+        return long
+
+    def _window_mean(self, start, end):
+        """Mean log index per suburb over the periods whose start falls in [start, end]"""
+        in_window = (self.periods >= pd.Timestamp(start)) & (self.periods <= pd.Timestamp(end))
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            return np.nanmean(np.where(in_window, self.log_index, np.nan), axis=1)
+
+    def window_growth(self, windows, end):
+        """
+        {period name: suburb, index_growth_pct} for each (period_start, previous_start) window
+
+        Growth is the change in mean log index from the previous window to the
+        period window; NaN where either window has no index value.
+        """
+        results = {}
+        for name, (period_start, previous_start) in windows.items():
+            current = self._window_mean(period_start, end)
+            previous = self._window_mean(previous_start, period_start - pd.Timedelta(days=1))
+            results[name] = pd.DataFrame({
+                'suburb': np.asarray(self.suburbs, dtype=object),
+                'index_growth_pct': (np.exp(current - previous) - 1) * 100
+            })
+        return results
@@ -0,0 +1,129 @@
+"""
+Road Network Accessibility
+Shortest-path distance from every address to the major road network
+
+Builds a routable directed graph from `roads.gpkg` (segment vertices become
+nodes, OSM `oneway` is respected: B = both ways, F = digitised direction,
+T = against it) and runs ONE multi-source Dijkstra on the reversed graph,
+seeded from every node on a major road. That yields, for every node, the
+network distance to the closest major road in a single pass. A property's
+distance is its snap distance to the nearest node that can reach a major
+road plus that node's distance.
+
+The graph and per-node distances are cached as .npz keyed on the road layer
+hash, so every scoring period reuses them at no extra cost.
+"""
+
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+from scipy import sparse
+from scipy.sparse.csgraph import dijkstra
+from distance_cache import ADDRESS_KEY, CACHE_DIR, DISTANCE_COLUMN, roads_layer_key
+from road_proximity import MAJOR_ROAD_CLASSES, METRIC_CRS
+
+SNAP_PRECISION_M = 0.1  # vertices closer than this are the same graph node
+
+
+def build_road_graph(roads, classes=MAJOR_ROAD_CLASSES, crs=METRIC_CRS):
+    """
+    Directed road graph in a metric CRS
+
+    Returns (node_xy, graph, major_nodes): node coordinates (n x 2), a CSR
+    matrix of edge lengths in metres, and the node ids lying on major roads.
+    """
+    roads = roads.to_crs(crs)
+    roads = roads[roads.geometry.notna() & ~roads.geometry.is_empty]
+    lines, segment_owner = shapely.get_parts(roads.geometry.values, return_index=True)
+
+    coords, line_idx = shapely.get_coordinates(lines, return_index=True)
+    snapped = np.round(coords / SNAP_PRECISION_M).astype('int64')
+    keys, node_of_vertex = np.unique(snapped, axis=0, return_inverse=True)
+    node_of_vertex = node_of_vertex.ravel()
+    node_xy = keys * SNAP_PRECISION_M
+
+    # Consecutive vertices of the same line form an edge
+    same_line = line_idx[1:] == line_idx[:-1]
+    u = node_of_vertex[:-1][same_line]
+    v = node_of_vertex[1:][same_line]
+    length = np.hypot(*(coords[1:][same_line] - coords[:-1][same_line]).T)
+    edge_road = segment_owner[line_idx[:-1][same_line]]
+
+    oneway = roads['oneway'].fillna('B').values[edge_road] if 'oneway' in roads else np.full(len(u), 'B')
+    forward = oneway != 'T'
+    backward = oneway != 'F'
+
+    edges = pd.DataFrame({
+        'u': np.concatenate([u[forward], v[backward]]),
+        'v': np.concatenate([v[forward], u[backward]]),
+        'length': np.concatenate([length[forward], length[backward]])
+    })
+    edges = edges[edges['u'] != edges['v']].groupby(['u', 'v'], as_index=False)['length'].min()
+
+    n = len(node_xy)
+    graph = sparse.csr_matrix((edges['length'], (edges['u'], edges['v'])), shape=(n, n))
+
+    is_major = roads['fclass'].isin(classes).values[edge_road]
+    major_nodes = np.unique(np.concatenate([u[is_major], v[is_major]]))
+    return node_xy, graph, major_nodes
+
+
+def distances_to_major_roads(graph, major_nodes):
+    """Network distance from every node to its closest major-road node (one Dijkstra pass)"""
+    if len(major_nodes) == 0:
+        return np.full(graph.shape[0], np.inf)
+    # Reversing the edges turns "from major roads" into "to major roads"
+    return dijkstra(graph.T.tocsr(), directed=True, indices=major_nodes, min_only=True)
+
+
+def load_network(roads_path='roads.gpkg', classes=MAJOR_ROAD_CLASSES, cache_dir=CACHE_DIR):
+    """Node coordinates and per-node major-road distances, from cache when the road layer is unchanged"""
+    key = roads_layer_key(roads_path, classes)
+    path = Path(cache_dir) / f'road_network_{key}.npz'
+    if path.exists():
+        cached = np.load(path)
+        return cached['node_xy'], cached['node_distance']
+
+    print("   Building road network graph...")
+    node_xy, graph, major_nodes = build_road_graph(gpd.read_file(roads_path), classes)
+    node_distance = distances_to_major_roads(graph, major_nodes)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez(path.with_suffix('.tmp.npz'), node_xy=node_xy, node_distance=node_distance)
+    path.with_suffix('.tmp.npz').replace(path)
+    for stale in Path(cache_dir).glob('road_network_*.npz'):
+        if stale != path:
+            stale.unlink()
+    return node_xy, node_distance
+
+
+def network_road_distances(points, roads_path='roads.gpkg', classes=MAJOR_ROAD_CLASSES,
+                           cache_dir=CACHE_DIR):
+    """
+    Network distance to the nearest major road for every address point in `points`
+
+    Same contract as `distance_cache.cached_road_distances`: one row per
+    distinct (gnaf_pid, latitude, longitude) with `distance_to_major_road_m`.
+    Addresses snap to the nearest node that can reach a major road, so a
+    closer node on a disconnected fragment is skipped; only a network with
+    no such node at all leaves NaN.
+    """
+    node_xy, node_distance = load_network(roads_path, classes, cache_dir)
+    addresses = points[ADDRESS_KEY].dropna(subset=['latitude', 'longitude']).drop_duplicates()
+
+    reachable = np.flatnonzero(np.isfinite(node_distance))
+    node_xy, node_distance = node_xy[reachable], node_distance[reachable]
+    nodes = gpd.GeoSeries(gpd.points_from_xy(node_xy[:, 0], node_xy[:, 1]), crs=METRIC_CRS)
+    address_points = gpd.GeoSeries(
+        gpd.points_from_xy(addresses['longitude'], addresses['latitude']), crs='EPSG:4326'
+    ).to_crs(METRIC_CRS)
+
+    (address_idx, node_idx), snap = nodes.sindex.nearest(
+        address_points.values, return_all=False, return_distance=True
+    )
+    distance = np.full(len(addresses), np.nan)
+    distance[address_idx] = snap + node_distance[node_idx]
+
+    return addresses.assign(**{DISTANCE_COLUMN: distance})
@@ -0,0 +1,151 @@
+"""
+Rolling Score History
+Monthly total_score and component series for every suburb over the whole history
+
+Each suburb's sales are walked once in date order while the scoring window
+slides forward month by month. Three sliding-median structures (current
+window prices, previous window prices, current window road distances) are
+updated incrementally: every sale enters and leaves each window exactly
+once, so hundreds of monthly snapshots cost one pass over the data rather
+than one full rescoring per month. Components use the same formulas as the
+snapshot scorer (`scoring.score_components`).
+"""
+
+import bisect
+import math
+import numpy as np
+import pandas as pd
+from period_windows import SortedTransactions
+from scoring import score_components
+
+HISTORY_COLUMNS = [
+    'suburb', 'anchor_date', 'total_score', 'price_growth_pct', 'period_median_price',
+    'period_transactions', 'previous_transactions', 'activity_change_pct',
+    'avg_distance_to_road_m', 'price_growth_score', 'affordability_score', 'yield_score',
+    'accessibility_score', 'liquidity_score'
+]
+
+
+class SlidingMedian:
+    """
+    Sorted multiset for a window median
+
+    Positions are found by binary search (O(log n)), but inserting into or
+    deleting from the Python list shifts its tail, so updates are O(n)
+    memmoves; fast for window sizes here, though not logarithmic. The median
+    read is O(1).
+    """
+
+    def __init__(self):
+        self.values = []
+
+    def __len__(self):
+        return len(self.values)
+
+    def add(self, value):
+        if not math.isnan(value):
+            bisect.insort(self.values, value)
+
+    def remove(self, value):
+        if not math.isnan(value):
+            del self.values[bisect.bisect_left(self.values, value)]
+
+    def median(self):
+        n = len(self.values)
+        if n == 0:
+            return np.nan
+        mid = n // 2
+        if n % 2:
+            return self.values[mid]
+        return (self.values[mid - 1] + self.values[mid]) / 2
+
+
+def monthly_anchors(first_date, latest_date, freq='MS'):
+    """Month-start anchors across the history, ending exactly at latest_date"""
+    anchors = pd.date_range(first_date, latest_date, freq=freq)
+    if len(anchors) == 0 or anchors[-1] != latest_date:
+        anchors = anchors.append(pd.DatetimeIndex([latest_date]))
+    return anchors
+
+
+def rolling_score_history(df, max_price, window=pd.DateOffset(months=12), anchors=None):
+    """
+    Score every suburb at every monthly anchor
+
+    For an anchor date the period is [anchor - window, anchor] and the
+    comparison is the equal-length span before it, as in the snapshot
+    periods. Returns a long frame (one row per suburb and anchor with sales
+    in the period) in HISTORY_COLUMNS layout.
+    """
+    store = df if isinstance(df, SortedTransactions) else SortedTransactions(df)
+    if anchors is None:
+        first = pd.Timestamp(int(store.seconds.min()), unit='s')
+        latest = pd.Timestamp(int(store.seconds.max()), unit='s')
+        anchors = monthly_anchors(first, latest)
+
+    anchors = pd.DatetimeIndex(anchors)
+    starts = anchors - window
+    previous_starts = starts - (anchors - starts)
+
+    def to_seconds(index):
+        return index.values.astype('datetime64[s]').astype('int64')
+
+    anchor_s, start_s, previous_s = to_seconds(anchors), to_seconds(starts), to_seconds(previous_starts)
+
+    n_suburbs, n_anchors = len(store.suburbs), len(anchors)
+    period_count = np.zeros((n_suburbs, n_anchors), dtype='int64')
+    previous_count = np.zeros((n_suburbs, n_anchors), dtype='int64')
+    period_median = np.full((n_suburbs, n_anchors), np.nan)
+    previous_median = np.full((n_suburbs, n_anchors), np.nan)
+    distance_median = np.full((n_suburbs, n_anchors), np.nan)
+
+    prices = store.values['price']
+    distances = store.values.get('distance_to_major_road_m', np.full(len(store), np.nan))
+
+    for code in range(n_suburbs):
+        lo, hi = store.offsets[code], store.offsets[code + 1]
+        seconds = store.seconds[lo:hi].tolist()
+        price = prices[lo:hi].tolist()
+        distance = distances[lo:hi].tolist()
+        n = hi - lo
+
+        current, previous, current_distance = SlidingMedian(), SlidingMedian(), SlidingMedian()
+        entered = left_current = left_previous = 0
+
+        for a in range(n_anchors):
+            while entered < n and seconds[entered] <= anchor_s[a]:
+                current.add(price[entered])
+                current_distance.add(distance[entered])
+                entered += 1
+            while left_current < entered and seconds[left_current] < start_s[a]:
+                current.remove(price[left_current])
+                current_distance.remove(distance[left_current])
+                previous.add(price[left_current])
+                left_current += 1
+            while left_previous < left_current and seconds[left_previous] < previous_s[a]:
+                previous.remove(price[left_previous])
+                left_previous += 1
+
+            period_count[code, a] = entered - left_current
+            previous_count[code, a] = left_current - left_previous
+            period_median[code, a] = current.median()
+            previous_median[code, a] = previous.median()
+            distance_median[code, a] = current_distance.median()
+
+    active = period_count > 0
+    suburb_idx, anchor_idx = np.nonzero(active)
+    components = score_components(
+        period_median[active], previous_median[active], period_count[active],
+        previous_count[active], distance_median[active], max_price
+    )
+
+    history = pd.DataFrame({
+        'suburb': store.suburbs[suburb_idx],
+        'anchor_date': anchors[anchor_idx],
+        'period_median_price': period_median[active],
+        'period_transactions': period_count[active],
+        'previous_transactions': previous_count[active],
+        'avg_distance_to_road_m': distance_median[active],
+        **components
+    })
+    return history[HISTORY_COLUMNS]
@@ -0,0 +1,83 @@
+"""
+Score Snapshot
+All period scores and the comparison table as Arrow IPC files
+
+The dashboard memory-maps these files instead of parsing the CSV exports on
+every cold start. Period rows are stored back to back in one table (each
+period in its exported order), with every period's (offset, length) as JSON
+in the schema metadata, so a reader slices out a period without copying.
+The comparison table is a second IPC file next to it. Both carry the same
+`generation` token in their metadata; the comparison is written first and
+the scores file last, so a reader that finds mismatched tokens has caught a
+write in progress. Missing numbers are filled with 0 and everything is
+rounded to 2 places at write time, as the dashboard's CSV loader does.
+
+`scoring.COMPONENT_WEIGHTS` is written alongside as component_weights.json,
+so the dashboard's custom-weight re-scoring reads the weights the scores
+were built with instead of keeping its own copy.
+"""
+
+import json
+import uuid
+from pathlib import Path
+import pandas as pd
+import pyarrow as pa
+from scoring import COMPONENT_WEIGHTS
+
+SNAPSHOT_FILENAME = 'scores_snapshot.arrow'
+COMPARISON_SNAPSHOT_FILENAME = 'comparison_snapshot.arrow'
+COMPONENT_WEIGHTS_FILENAME = 'component_weights.json'
+
+
+def period_id(period_name):
+    """'1-Year' -> '1_year', the suffix of investment_scores_<id>.csv"""
+    return period_name.lower().replace('-', '_')
+
+
+def dashboard_frame(df, decimals=2):
+    """Numeric columns NaN -> 0 and rounded; text columns left as they are"""
+    numeric = df.select_dtypes('number').columns
+    df = df.copy()
+    df[numeric] = df[numeric].fillna(0)
+    return df.round(decimals) if decimals is not None else df
+
+
+def write_ipc_file(table, path):
+    """Write `table` as an Arrow IPC file via a temporary file and an atomic rename"""
+    tmp_path = path.with_suffix('.tmp')
+    with pa.OSFile(str(tmp_path), 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    tmp_path.replace(path)
+
+
+def write_component_weights(output_dir='.'):
+    """Write the default component weights as JSON via a temporary file and an atomic rename"""
+    path = Path(output_dir) / COMPONENT_WEIGHTS_FILENAME
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(COMPONENT_WEIGHTS, f, indent=2)
+    tmp_path.replace(path)
+    return path
+
+
+def write_score_snapshot(all_results, comparison_df, output_dir='.'):
+    """Write {period name: scores frame} and the comparison frame to the snapshot files"""
+    frames, ranges, offset = [], {}, 0
+    for period_name, df in all_results.items():
+        frames.append(dashboard_frame(df))
+        ranges[period_id(period_name)] = [offset, len(df)]
+        offset += len(df)
+
+    generation = uuid.uuid4().hex.encode()
+    scores = pa.Table.from_pandas(pd.concat(frames, ignore_index=True), preserve_index=False)
+    scores = scores.replace_schema_metadata({b'periods': json.dumps(ranges).encode(), b'generation': generation})
+    # Comparison scores are filled but not rounded, as the dashboard loads them
+    comparison = pa.Table.from_pandas(dashboard_frame(comparison_df, decimals=None), preserve_index=False)
+    comparison = comparison.replace_schema_metadata({b'generation': generation})
+
+    path = Path(output_dir) / SNAPSHOT_FILENAME
+    write_component_weights(output_dir)
+    write_ipc_file(comparison, Path(output_dir) / COMPARISON_SNAPSHOT_FILENAME)
+    write_ipc_file(scores, path)
+    return path
@@ -0,0 +1,260 @@
+"""
+Microburbs Scoring Engine
+Vectorized G(35) + P(15) + Y(25) + A(15) + L(10) scoring for all suburbs at once
+
+Per-suburb window metrics come from grouped aggregations, and every
+component, band and label is computed column-wise with NumPy, so a period is
+scored in a handful of array operations instead of a boolean-mask filter per
+suburb. The formulas are the ones the analysis scripts have always used:
+
+  G = Price Growth    min(35, max(0, growth% / 10 * 35)), 17.5 with no prior sales
+  P = Affordability   max(0, 15 - median / market 95th percentile * 15)
+  Y = Rental Yield    min(25, yield% / 6 * 25), yield banded on median price
+  A = Accessibility   max(0, 15 - median road distance / 5000 * 15), 7.5 if unknown
+  L = Liquidity       min(10, max(0, 5 + activity change% / 100 * 5)), 8 with no prior sales
+"""
+
+import numpy as np
+import pandas as pd
+
+# Component maxima; the neutral fallbacks and liquidity's midpoint are fractions of these
+COMPONENT_WEIGHTS = {
+    'price_growth_score': 35,
+    'affordability_score': 15,
+    'yield_score': 25,
+    'accessibility_score': 15,
+    'liquidity_score': 10
+}
+
+# Sydney market rental yield benchmarks: (upper price bound, yield %)
+YIELD_BANDS = [(800000, 5.5), (1500000, 4.5), (3000000, 3.8)]
+TOP_BAND_YIELD = 3.2
+
+# (minimum transactions, label), checked top-down
+RELIABILITY_BANDS = [(50, 'VERY HIGH'), (20, 'HIGH'), (10, 'MODERATE'), (5, 'LOW')]
+RELIABILITY_DEFAULT = 'VERY LOW'
+RECENT_RELIABILITY_BANDS = [(5, 'HIGH'), (3, 'MODERATE')]
+RECENT_RELIABILITY_DEFAULT = 'LOW'
+
+# (minimum score, action, score range, signal, colour), checked top-down
+INVESTMENT_SIGNALS = [
+    (75, 'STRONG BUY', '> 75', 'Ideal short- to mid-term buy', '#27ae60'),
+    (60, 'BUY', '60-75', 'Moderate risk, solid entry point', '#f39c12'),
+    (45, 'HOLD/ACCUMULATE', '45-60', 'Hold or long-term accumulation', '#3498db'),
+    (30, 'CAUTION', '30-45', 'Caution advised', '#e67e22'),
+]
+INVESTMENT_SIGNAL_DEFAULT = ('AVOID', '< 30', 'Avoid', '#e74c3c')
+
+SCORE_COLUMNS = [
+    'suburb', 'total_score', 'price_growth_pct', 'period_median_price', 'estimated_yield_pct',
+    'estimated_monthly_rent', 'period_transactions', 'previous_transactions',
+    'activity_change_pct', 'avg_distance_to_road_m',
+    'price_growth_score', 'affordability_score', 'yield_score', 'accessibility_score',
+    'liquidity_score'
+]
+
+# Column layout of the investment_scores_*.csv exports
+PERIOD_OUTPUT_COLUMNS = [
+    'suburb', 'period', 'total_score', 'price_growth_pct', 'period_median_price',
+    'estimated_yield_pct', 'estimated_monthly_rent', 'period_transactions',
+    'activity_change_pct', 'avg_distance_to_road_m', 'reliability',
+    'price_growth_score', 'affordability_score', 'yield_score', 'accessibility_score',
+    'liquidity_score'
+]
+
+# Column layout of microburbs_final_scores_with_signals.csv (final_analysis.py)
+FINAL_OUTPUT_COLUMNS = [
+    'suburb', 'total_score', 'action', 'score_range', 'investment_signal', 'reliability',
+    'price_growth_score', 'affordability_score', 'yield_score', 'accessibility_score',
+    'liquidity_score',
+    'recent_median_price', 'price_growth_pct', 'estimated_yield_pct', 'estimated_monthly_rent',
+    'avg_distance_to_road_m', 'recent_transactions', 'previous_transactions', 'activity_change_pct'
+]
+
+
+def estimate_rental_yield(median_price):
+    """Estimated rental yield % for each median price"""
+    median_price = np.asarray(median_price, dtype=float)
+    return np.select(
+        [median_price < bound for bound, _ in YIELD_BANDS],
+        [rental_yield for _, rental_yield in YIELD_BANDS],
+        TOP_BAND_YIELD
+    )
+
+
+def reliability_label(transactions, bands=RELIABILITY_BANDS, default=RELIABILITY_DEFAULT):
+    """Sample-size reliability label for each transaction count"""
+    transactions = np.asarray(transactions)
+    return np.select(
+        [transactions >= minimum for minimum, _ in bands],
+        [label for _, label in bands],
+        default
+    )
+
+
+def investment_signals(total_score):
+    """action, score_range, investment_signal and colour for each score"""
+    total_score = np.asarray(total_score, dtype=float)
+    # Only the top band is exclusive (> 75); the rest are >= their floor
+    conditions = [
+        total_score > minimum if i == 0 else total_score >= minimum
+        for i, (minimum, *_) in enumerate(INVESTMENT_SIGNALS)
+    ]
+    columns = ['action', 'score_range', 'investment_signal', 'color']
+    return pd.DataFrame({
+        column: np.select(conditions, [band[i + 1] for band in INVESTMENT_SIGNALS],
+                          INVESTMENT_SIGNAL_DEFAULT[i])
+        for i, column in enumerate(columns)
+    })
+
+
+def suburb_window_metrics(period_data, previous_data, coords_data, suburbs):
+    """
+    Per-suburb counts, medians and median road distance for one scoring window
+
+    `coords_data` is the road-distance frame already restricted to the period.
+    Rows follow `suburbs` order; suburbs without sales in the period are dropped.
+    `suburb` comes back as plain strings even when `suburbs` is categorical.
+    """
+    period = period_data.groupby('suburb', observed=True, sort=False)['price'].agg(
+        period_transactions='size', period_median_price='median'
+    )
+    previous = previous_data.groupby('suburb', observed=True, sort=False)['price'].agg(
+        previous_transactions='size', previous_median_price='median'
+    )
+
+    metrics = pd.DataFrame(index=pd.Index(np.asarray(suburbs, dtype=object), name='suburb')).join(period).join(previous)
+    if 'distance_to_major_road_m' in coords_data:
+        distance = coords_data.groupby('suburb', observed=True, sort=False)[
+            'distance_to_major_road_m'].median()
+        metrics = metrics.join(distance.rename('avg_distance_to_road_m'))
+    else:
+        metrics['avg_distance_to_road_m'] = np.nan
+
+    metrics = metrics[metrics['period_transactions'].fillna(0) > 0]
+    metrics['period_transactions'] = metrics['period_transactions'].astype(int)
+    metrics['previous_transactions'] = metrics['previous_transactions'].fillna(0).astype(int)
+    return metrics.reset_index()
+
+
+def score_components(period_median, previous_median, period_count, previous_count,
+                     avg_distance, max_price, growth_pct=None):
+    """
+    All five component scores plus the raw growth/yield/activity metrics
+
+    Inputs are equal-length arrays (or broadcastable, e.g. bootstrap draws
+    against fixed counts). `growth_pct` (e.g. a repeat-sales index growth)
+    replaces the median-based growth wherever it is not NaN. Returns a dict
+    of arrays.
+    """
+    period_median = np.asarray(period_median, dtype=float)
+    previous_median = np.asarray(previous_median, dtype=float)
+    period_count = np.asarray(period_count, dtype=float)
+    previous_count = np.asarray(previous_count, dtype=float)
+    avg_distance = np.asarray(avg_distance, dtype=float)
+
+    growth_cap = COMPONENT_WEIGHTS['price_growth_score']
+    affordability_cap = COMPONENT_WEIGHTS['affordability_score']
+    yield_cap = COMPONENT_WEIGHTS['yield_score']
+    accessibility_cap = COMPONENT_WEIGHTS['accessibility_score']
+    liquidity_cap = COMPONENT_WEIGHTS['liquidity_score']
+
+    has_previous = previous_count >= 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = ((period_median - previous_median) / previous_median) * 100
+        activity = ((period_count - previous_count) / previous_count) * 100
+    has_growth = has_previous
+    if growth_pct is not None:
+        growth_pct = np.asarray(growth_pct, dtype=float)
+        has_growth = has_previous | ~np.isnan(growth_pct)
+        growth = np.where(np.isnan(growth_pct), growth, growth_pct)
+    price_growth = np.where(has_growth, growth, 0)
+    price_growth_score = np.where(
+        has_growth, np.clip((growth / 10) * growth_cap, 0, growth_cap), growth_cap / 2
+    )
+
+    affordability_score = np.maximum(0, affordability_cap - (period_median / max_price) * affordability_cap)
+
+    estimated_yield = estimate_rental_yield(period_median)
+    yield_score = np.minimum(yield_cap, (estimated_yield / 6) * yield_cap)
+
+    has_distance = ~np.isnan(avg_distance)
+    accessibility_score = np.where(
+        has_distance, np.maximum(0, accessibility_cap - (avg_distance / 5000) * accessibility_cap),
+        accessibility_cap / 2
+    )
+
+    activity_change = np.where(has_previous, activity, 100)
+    liquidity_score = np.where(
+        has_previous,
+        np.clip(liquidity_cap / 2 + (activity / 100) * (liquidity_cap / 2), 0, liquidity_cap),
+        liquidity_cap * 0.8
+    )
+
+    total_score = (price_growth_score + affordability_score +
+                   yield_score + accessibility_score + liquidity_score)
+
+    return {
+        'total_score': total_score,
+        'price_growth_pct': price_growth,
+        'estimated_yield_pct': estimated_yield,
+        'estimated_monthly_rent': period_median * estimated_yield / 100 / 12,
+        'activity_change_pct': activity_change,
+        'price_growth_score': price_growth_score,
+        'affordability_score': affordability_score,
+        'yield_score': yield_score,
+        'accessibility_score': accessibility_score,
+        'liquidity_score': liquidity_score
+    }
+
+
+def score_suburbs(metrics, max_price):
+    """
+    Score every suburb in a metrics frame (see `suburb_window_metrics`)
+
+    An `index_growth_pct` column, when present, is used as the growth input.
+    """
+    components = score_components(
+        metrics['period_median_price'], metrics['previous_median_price'],
+        metrics['period_transactions'], metrics['previous_transactions'],
+        metrics['avg_distance_to_road_m'], max_price,
+        growth_pct=metrics['index_growth_pct'] if 'index_growth_pct' in metrics else None
+    )
+    scores = metrics.assign(**components)
+    return scores[SCORE_COLUMNS]
+
+
+def score_metrics(metrics, max_price, reliability_bands=RELIABILITY_BANDS,
+                  reliability_default=RELIABILITY_DEFAULT):
+    """Scores plus reliability label for a metrics frame, in its row order"""
+    scores = score_suburbs(metrics, max_price)
+    scores['reliability'] = reliability_label(
+        scores['period_transactions'], reliability_bands, reliability_default
+    )
+    return scores
+
+
+def score_period(period_data, previous_data, coords_data, suburbs, max_price,
+                 reliability_bands=RELIABILITY_BANDS, reliability_default=RELIABILITY_DEFAULT):
+    """Scores for one window, in `suburbs` order (callers sort by total_score)"""
+    metrics = suburb_window_metrics(period_data, previous_data, coords_data, suburbs)
+    return score_metrics(metrics, max_price, reliability_bands, reliability_default)
+
+
+def period_comparison(all_results, suburbs):
+    """multi_period_comparison.csv layout: one row per suburb, five columns per period"""
+    comparison_df = pd.DataFrame({'suburb': suburbs})
+    for period_name, results in all_results.items():
+        period_df = results.drop_duplicates('suburb').set_index('suburb')
+        comparison_df = comparison_df.join(period_df[[
+            'total_score', 'price_growth_pct', 'period_median_price', 'period_transactions', 'reliability'
+        ]].rename(columns={
+            'total_score': f'{period_name}_score',
+            'price_growth_pct': f'{period_name}_growth',
+            'period_median_price': f'{period_name}_price',
+            'period_transactions': f'{period_name}_transactions',
+            'reliability': f'{period_name}_reliability'
+        }), on='suburb')
+        comparison_df[f'{period_name}_transactions'] = comparison_df[f'{period_name}_transactions'].fillna(0).astype(int)
+        comparison_df[f'{period_name}_reliability'] = comparison_df[f'{period_name}_reliability'].fillna('NO DATA')
+    return comparison_df
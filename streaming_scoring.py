@@ -0,0 +1,146 @@
+"""
+Streaming Scoring
+Out-of-core scoring from Arrow record batches
+
+Transactions are scanned in record batches of `STREAM_BATCH_ROWS` rows
+(projected to the four columns scoring needs, priced sales only). GNAF is
+read once per run, kept to the principal geocode of each sold address and
+indexed by gnaf_key. Each batch is geocoded by a lookup in that index and
+gets road distances from the road distance cache. The cache is read for the
+batch's own pids only; new distances are spilled to segments and folded into
+it once at the end. The batch is then folded into per-(suburb, month) price
+and distance sketches and dropped. Folding recompresses only the groups a
+batch touches, each capped at `compression` centroids, so a batch costs time
+in proportion to its own rows. Once the scan finishes, every period is
+scored from those accumulators. Peak memory is one batch, plus sketches
+bounded by suburbs x months x compression, plus the geocode index (a key and
+two coordinates per sold address), whatever the number of sales.
+
+The finished accumulators, with every batch's sale keys, are saved as the
+incremental ingestion state, so daily deltas can be applied on top
+(`incremental_ingest.py`). Windows are month-grained, as in incremental mode.
+
+Usage: STREAM_BATCH_ROWS=500000 python3 streaming_scoring.py [transactions path or dataset dir]
+"""
+
+import os
+import sys
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from compact_schema import gnaf_pid_key, normalize_gnaf
+from data_access import GEOCODE_COLUMNS, GNAF_PATH, open_dataset, sale_filter, transactions_source
+from distance_cache import DISTANCE_COLUMN, DistanceCache
+from enrich_transactions import principal_geocodes
+from incremental_ingest import (INGEST_DIR, analysis_windows, locate_sales, market_sketch, new_generation,
+                                sale_keys, save_state, sketch_window_metrics, write_outputs, write_sale_keys)
+from quantile_sketch import DEFAULT_COMPRESSION, SketchAccumulator
+
+DEFAULT_BATCH_ROWS = int(os.environ.get('STREAM_BATCH_ROWS', 250_000))
+STREAM_COLUMNS = ['gnaf_pid', 'suburb', 'dat', 'price']
+
+
+def transaction_batches(path=None, batch_rows=DEFAULT_BATCH_ROWS):
+    """Priced sales as DataFrames of at most `batch_rows` rows"""
+    scanner = open_dataset(path or transactions_source()).scanner(
+        columns=STREAM_COLUMNS, filter=sale_filter('dat'), batch_size=batch_rows
+    )
+    for batch in scanner.to_batches():
+        if batch.num_rows > 0:
+            df = batch.to_pandas()
+            df['sale_date'] = pd.to_datetime(df['dat'])
+            df['suburb'] = df['suburb'].astype(str)
+            yield df
+
+
+def sold_geocodes(path=None, gnaf_path=GNAF_PATH, batch_rows=DEFAULT_BATCH_ROWS):
+    """
+    Principal geocode of every sold address, indexed by gnaf_key
+
+    One pass over the sales' gnaf_pid column collects the sold keys, then one
+    batched pass over GNAF keeps only their rows, so neither file is read
+    per batch of sales.
+    """
+    scanner = open_dataset(path or transactions_source()).scanner(
+        columns=['gnaf_pid'], filter=sale_filter('dat'), batch_size=batch_rows
+    )
+    sold = np.unique(np.concatenate([np.empty(0, dtype='int64')] + [
+        gnaf_pid_key(batch.column('gnaf_pid').to_pandas()).dropna().to_numpy(dtype='int64')
+        for batch in scanner.to_batches()
+    ]))
+
+    rows = []
+    for batch in open_dataset(gnaf_path).scanner(columns=GEOCODE_COLUMNS, batch_size=batch_rows).to_batches():
+        df_gnaf = normalize_gnaf(batch.to_pandas())
+        rows.append(df_gnaf[np.isin(df_gnaf['gnaf_key'].to_numpy(), sold)])
+    if not rows:
+        return pd.DataFrame({'latitude': [], 'longitude': []}, index=pd.Index([], dtype='int64', name='gnaf_key'))
+    return principal_geocodes(pd.concat(rows, ignore_index=True)).set_index('gnaf_key')
+
+
+def stream_state(path=None, batch_rows=DEFAULT_BATCH_ROWS, gnaf_path=GNAF_PATH,
+                 compression=DEFAULT_COMPRESSION, ingest_dir=INGEST_DIR):
+    """
+    Fold every batch into sketch accumulators and compute all period window metrics
+
+    Each batch's sale keys are written to their own file under the ingest
+    state's sale_keys/, for `save_state` to commit.
+    """
+    geocodes = sold_geocodes(path, gnaf_path, batch_rows)
+    print(f"   GNAF: {len(geocodes):,} sold addresses geocoded")
+    generation = new_generation()
+    key_files = []
+    prices, distances = SketchAccumulator(compression), SketchAccumulator(compression)
+    distance_cache = DistanceCache()
+    latest_date = None
+    suburbs = {}  # insertion-ordered: first-seen order, as the full pipeline uses
+    total = 0
+
+    try:
+        for i, batch in enumerate(transaction_batches(path, batch_rows), 1):
+            batch = locate_sales(batch, gnaf_path, distance_cache, geocodes)
+            prices.add(batch, 'price')
+            distances.add(batch, DISTANCE_COLUMN)
+            key_files.append(f'{generation}-{i}.parquet')
+            write_sale_keys(sale_keys(batch), Path(ingest_dir) / 'sale_keys' / key_files[-1])
+
+            suburbs.update(dict.fromkeys(batch['suburb']))
+            batch_latest = batch['sale_date'].max()
+            latest_date = batch_latest if latest_date is None else max(latest_date, batch_latest)
+            total += len(batch)
+            print(f"   Batch {i}: {len(batch):,} sales folded ({total:,} total, "
+                  f"{len(prices):,} price centroids)")
+    finally:
+        # Distances computed so far are valid whatever happens to the scan
+        distance_cache.flush()
+
+    if latest_date is None:
+        raise ValueError('No priced transactions to score')
+
+    suburbs = list(suburbs)
+    prices, distances = prices.store(), distances.store()
+    return {
+        'latest_date': latest_date,
+        'suburbs': suburbs,
+        'generation': generation,
+        'key_files': key_files,
+        'market_prices': market_sketch(prices),
+        'prices': prices,
+        'distances': distances,
+        'metrics': {
+            name: sketch_window_metrics(prices, distances, suburbs, start, previous_start, latest_date)
+            for name, (start, previous_start) in analysis_windows(latest_date).items()
+        }
+    }
+
+
+if __name__ == '__main__':
+    print("="*80)
+    print("🌊 STREAMING MULTI-PERIOD SCORING")
+    print(f"   Record batches of {DEFAULT_BATCH_ROWS:,} rows")
+    print("="*80)
+
+    state = stream_state(sys.argv[1] if len(sys.argv) > 1 else None)
+    save_state(state)
+    write_outputs(state)
+    print(f"\n✅ Scored {len(state['suburbs']):,} suburbs up to {state['latest_date'].date()}")
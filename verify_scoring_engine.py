@@ -0,0 +1,327 @@
+"""
+Scoring Engine Golden Check
+Verifies the vectorized scoring engine against the original per-suburb loop
+
+The references below are the scoring loops `comprehensive_analysis.py` and
+`final_analysis.py` used before the engine existed. The multi-period engine
+path (one sorted store, all periods' windows from `parallel_window_metrics`,
+across SCORING_WORKERS processes when set, then `score_metrics`) and the
+12-month `score_period` + `investment_signals` path of `final_analysis.py`
+run on the same inputs, and the exported frames (rows, order and values) must
+match.
+
+The engine's frames are also checked against the committed exports
+(investment_scores_*.csv and microburbs_final_scores_with_signals.csv),
+matched by suburb. Those exports predate the metric-CRS road distance engine
+(`road_proximity`; the old scripts multiplied degrees by 111 km), so road
+distance and the accessibility score are left out there, and total_score is
+compared without its accessibility component.
+
+A last check scores windows ending six months before the latest sale from
+the full store and from a store truncated at that end; nothing after `end`
+(prices or road distances) may leak into the metrics.
+
+Usage: python3 verify_scoring_engine.py
+"""
+
+import sys
+from pathlib import Path
+import pandas as pd
+from data_access import SCORING_COLUMNS
+from enrich_transactions import load_enriched_transactions
+from distance_cache import ADDRESS_KEY, cached_road_distances
+from period_windows import SortedTransactions, multi_period_metrics
+from parallel_scoring import parallel_window_metrics
+from scoring import (FINAL_OUTPUT_COLUMNS, PERIOD_OUTPUT_COLUMNS, RECENT_RELIABILITY_BANDS,
+                     RECENT_RELIABILITY_DEFAULT, investment_signals, score_metrics, score_period)
+
+# Columns that follow the road distances, which the committed exports measured differently
+DISTANCE_DEPENDENT_COLUMNS = ['avg_distance_to_road_m', 'accessibility_score']
+
+
+def legacy_estimate_rental_yield(price):
+    if price < 800000: return 5.5
+    elif price < 1500000: return 4.5
+    elif price < 3000000: return 3.8
+    else: return 3.2
+
+
+def legacy_score_period(df_trans, df_with_coords, period_name, period_start, latest_date):
+    """Original per-suburb boolean-mask scoring loop"""
+    period_data = df_trans[df_trans['sale_date'] >= period_start]
+    period_length = latest_date - period_start
+    previous_start = period_start - period_length
+    previous_data = df_trans[(df_trans['sale_date'] >= previous_start) & (df_trans['sale_date'] < period_start)]
+
+    results = []
+    for suburb in df_trans['suburb'].unique():
+        suburb_period = period_data[period_data['suburb'] == suburb]
+        suburb_previous = previous_data[previous_data['suburb'] == suburb]
+        suburb_coords = df_with_coords[df_with_coords['suburb'] == suburb]
+        if len(suburb_period) == 0:
+            continue
+
+        period_count = len(suburb_period)
+        period_median = suburb_period['price'].median()
+
+        if len(suburb_previous) >= 1:
+            previous_median = suburb_previous['price'].median()
+            price_growth = ((period_median - previous_median) / previous_median) * 100
+            price_growth_score = min(35, max(0, (price_growth / 10) * 35))
+        else:
+            price_growth = 0
+            price_growth_score = 17.5
+
+        max_price = df_trans['price'].quantile(0.95)
+        affordability_score = max(0, 15 - (period_median / max_price) * 15)
+
+        estimated_yield = legacy_estimate_rental_yield(period_median)
+        yield_score = min(25, (estimated_yield / 6) * 25)
+
+        period_coords = suburb_coords[suburb_coords['sale_date'] >= period_start]
+        if len(period_coords[period_coords['distance_to_major_road_m'].notna()]) > 0:
+            avg_distance = period_coords['distance_to_major_road_m'].median()
+            accessibility_score = max(0, 15 - (avg_distance / 5000) * 15)
+        else:
+            avg_distance = None
+            accessibility_score = 7.5
+
+        previous_count = len(suburb_previous)
+        if previous_count > 0:
+            activity_change = ((period_count - previous_count) / previous_count) * 100
+            liquidity_score = min(10, max(0, 5 + (activity_change / 100) * 5))
+        else:
+            activity_change = 100
+            liquidity_score = 8
+
+        total_score = price_growth_score + affordability_score + yield_score + accessibility_score + liquidity_score
+
+        if period_count >= 50:
+            reliability = 'VERY HIGH'
+        elif period_count >= 20:
+            reliability = 'HIGH'
+        elif period_count >= 10:
+            reliability = 'MODERATE'
+        elif period_count >= 5:
+            reliability = 'LOW'
+        else:
+            reliability = 'VERY LOW'
+
+        results.append({
+            'suburb': suburb,
+            'period': period_name,
+            'total_score': total_score,
+            'price_growth_pct': price_growth,
+            'period_median_price': period_median,
+            'estimated_yield_pct': estimated_yield,
+            'estimated_monthly_rent': period_median * estimated_yield / 100 / 12,
+            'period_transactions': period_count,
+            'activity_change_pct': activity_change,
+            'avg_distance_to_road_m': avg_distance,
+            'reliability': reliability,
+            'price_growth_score': price_growth_score,
+            'affordability_score': affordability_score,
+            'yield_score': yield_score,
+            'accessibility_score': accessibility_score,
+            'liquidity_score': liquidity_score
+        })
+
+    return pd.DataFrame(results).sort_values('total_score', ascending=False)
+
+
+def legacy_investment_signal(score):
+    if score > 75: return 'STRONG BUY', '> 75', 'Ideal short- to mid-term buy'
+    elif score >= 60: return 'BUY', '60-75', 'Moderate risk, solid entry point'
+    elif score >= 45: return 'HOLD/ACCUMULATE', '45-60', 'Hold or long-term accumulation'
+    elif score >= 30: return 'CAUTION', '30-45', 'Caution advised'
+    else: return 'AVOID', '< 30', 'Avoid'
+
+
+def legacy_final_scores(df_trans, df_with_coords, twelve_months_ago, twenty_four_months_ago):
+    """Original `final_analysis.py` 12-month loop, with its HIGH/MODERATE/LOW reliability and signals"""
+    recent = df_trans[df_trans['sale_date'] >= twelve_months_ago]
+    previous = df_trans[(df_trans['sale_date'] >= twenty_four_months_ago) &
+                        (df_trans['sale_date'] < twelve_months_ago)]
+
+    results = []
+    for suburb in df_trans['suburb'].unique():
+        suburb_recent = recent[recent['suburb'] == suburb]
+        suburb_previous = previous[previous['suburb'] == suburb]
+        suburb_coords = df_with_coords[df_with_coords['suburb'] == suburb]
+        recent_count = len(suburb_recent)
+        if recent_count == 0:
+            continue
+
+        recent_median = suburb_recent['price'].median()
+        if len(suburb_previous) >= 1:
+            previous_median = suburb_previous['price'].median()
+            price_growth = ((recent_median - previous_median) / previous_median) * 100
+            price_growth_score = min(35, max(0, (price_growth / 10) * 35))
+        else:
+            price_growth = 0
+            price_growth_score = 17.5
+
+        max_price = df_trans['price'].quantile(0.95)
+        affordability_score = max(0, 15 - (recent_median / max_price) * 15)
+
+        estimated_yield = legacy_estimate_rental_yield(recent_median)
+        yield_score = min(25, (estimated_yield / 6) * 25)
+
+        suburb_recent_coords = suburb_coords[suburb_coords['sale_date'] >= twelve_months_ago]
+        if len(suburb_recent_coords[suburb_recent_coords['distance_to_major_road_m'].notna()]) > 0:
+            avg_distance = suburb_recent_coords['distance_to_major_road_m'].median()
+            accessibility_score = max(0, 15 - (avg_distance / 5000) * 15)
+        else:
+            avg_distance = None
+            accessibility_score = 7.5
+
+        previous_count = len(suburb_previous)
+        reliability = 'HIGH' if recent_count >= 5 else 'MODERATE' if recent_count >= 3 else 'LOW'
+        if previous_count > 0:
+            activity_change = ((recent_count - previous_count) / previous_count) * 100
+            liquidity_score = min(10, max(0, 5 + (activity_change / 100) * 5))
+        else:
+            activity_change = 100
+            liquidity_score = 8
+
+        total_score = (price_growth_score + affordability_score +
+                       yield_score + accessibility_score + liquidity_score)
+        action, score_range, signal = legacy_investment_signal(total_score)
+
+        results.append({
+            'suburb': suburb,
+            'total_score': total_score,
+            'action': action,
+            'score_range': score_range,
+            'investment_signal': signal,
+            'reliability': reliability,
+            'price_growth_score': price_growth_score,
+            'affordability_score': affordability_score,
+            'yield_score': yield_score,
+            'accessibility_score': accessibility_score,
+            'liquidity_score': liquidity_score,
+            'recent_median_price': recent_median,
+            'price_growth_pct': price_growth,
+            'estimated_yield_pct': estimated_yield,
+            'estimated_monthly_rent': recent_median * estimated_yield / 100 / 12,
+            'avg_distance_to_road_m': avg_distance,
+            'recent_transactions': recent_count,
+            'previous_transactions': previous_count,
+            'activity_change_pct': activity_change
+        })
+
+    return pd.DataFrame(results).sort_values('total_score', ascending=False)
+
+
+def engine_final_scores(df_trans, df_with_coords, twelve_months_ago, twenty_four_months_ago):
+    """Step 4 of `final_analysis.py`"""
+    recent = df_trans[df_trans['sale_date'] >= twelve_months_ago]
+    previous = df_trans[(df_trans['sale_date'] >= twenty_four_months_ago) &
+                        (df_trans['sale_date'] < twelve_months_ago)]
+    recent_coords = df_with_coords[df_with_coords['sale_date'] >= twelve_months_ago]
+
+    scores = score_period(
+        recent, previous, recent_coords, df_trans['suburb'].unique(), df_trans['price'].quantile(0.95),
+        reliability_bands=RECENT_RELIABILITY_BANDS, reliability_default=RECENT_RELIABILITY_DEFAULT
+    ).rename(columns={
+        'period_median_price': 'recent_median_price',
+        'period_transactions': 'recent_transactions'
+    })
+    signals = investment_signals(scores['total_score'])
+    results = pd.concat([scores, signals[['action', 'score_range', 'investment_signal']]], axis=1)
+    return results[FINAL_OUTPUT_COLUMNS].sort_values('total_score', ascending=False)
+
+
+def export_check(engine, export_path):
+    """(engine frame, committed export) by suburb, without the distance-dependent columns"""
+    pair = []
+    for frame in (engine, pd.read_csv(export_path)):
+        # total_score less accessibility: the part the distance method doesn't touch
+        frame = frame.assign(total_score=frame['total_score'] - frame['accessibility_score'])
+        pair.append(frame.drop(columns=DISTANCE_DEPENDENT_COLUMNS).sort_values('suburb'))
+    return tuple(pair)
+
+
+def truncated_end_check(df_with_coords, periods, end):
+    """(metrics from the full store, metrics from a store truncated at `end`), both ordered by suburb"""
+    windows = {
+        period_name: (period_start, period_start - (end - period_start))
+        for period_name, period_start in periods.items()
+    }
+    full = multi_period_metrics(SortedTransactions(df_with_coords), windows, end)
+    truncated = multi_period_metrics(
+        SortedTransactions(df_with_coords[df_with_coords['sale_date'] <= end]), windows, end
+    )
+    return {
+        period_name: (full[period_name].sort_values('suburb'), truncated[period_name].sort_values('suburb'))
+        for period_name in windows
+    }
+
+
+def engine_score_periods(df_trans, df_with_coords, periods, latest_date):
+    windows = {
+        period_name: (period_start, period_start - (latest_date - period_start))
+        for period_name, period_start in periods.items()
+    }
+    window_metrics = parallel_window_metrics(SortedTransactions(df_with_coords), windows, latest_date)
+    max_price = df_trans['price'].quantile(0.95)
+
+    results = {}
+    for period_name, metrics in window_metrics.items():
+        scores = score_metrics(metrics, max_price)
+        scores['period'] = period_name
+        results[period_name] = scores[PERIOD_OUTPUT_COLUMNS].sort_values('total_score', ascending=False)
+    return results
+
+
+if __name__ == '__main__':
+    df_trans = load_enriched_transactions(columns=SCORING_COLUMNS)
+    from_2016 = df_trans[df_trans['latitude'].notna() & (df_trans['sale_date'] >= '2016-01-01')]
+    df_with_coords = df_trans.merge(cached_road_distances(from_2016), on=ADDRESS_KEY, how='left')
+
+    latest_date = df_trans['sale_date'].max()
+    periods = {
+        '1-Year': latest_date - pd.DateOffset(months=12),
+        '3-Year': latest_date - pd.DateOffset(years=3),
+        '5-Year': latest_date - pd.DateOffset(years=5),
+        '9-Year': pd.Timestamp('2016-01-01')
+    }
+
+    engine_results = engine_score_periods(df_trans, df_with_coords, periods, latest_date)
+
+    checks = {
+        period_name: (engine_results[period_name],
+                      legacy_score_period(df_trans, df_with_coords, period_name, period_start, latest_date))
+        for period_name, period_start in periods.items()
+    }
+    final_windows = (latest_date - pd.DateOffset(months=12), latest_date - pd.DateOffset(months=24))
+    engine_final = engine_final_scores(df_trans, df_with_coords, *final_windows)
+    checks['final_analysis 12-Month'] = (engine_final,
+                                         legacy_final_scores(df_trans, df_with_coords, *final_windows))
+
+    exports = {f"investment_scores_{name.lower().replace('-', '_')}.csv": engine_results[name] for name in periods}
+    exports['microburbs_final_scores_with_signals.csv'] = engine_final
+    for filename, engine in exports.items():
+        if Path(filename).exists():
+            checks[f'{filename} (committed export, distances aside)'] = export_check(engine, filename)
+        else:
+            print(f"⚠️  {filename} not found; skipping its export check")
+
+    early_end = latest_date - pd.DateOffset(months=6)
+    early_periods = {'1-Year': early_end - pd.DateOffset(months=12), '3-Year': early_end - pd.DateOffset(years=3)}
+    for period_name, pair in truncated_end_check(df_with_coords, early_periods, early_end).items():
+        checks[f'{period_name} ending {early_end.strftime("%Y-%m-%d")} vs truncated store'] = pair
+
+    failures = 0
+    for name, (engine, golden) in checks.items():
+        try:
+            pd.testing.assert_frame_equal(
+                engine.reset_index(drop=True), golden.reset_index(drop=True),
+                check_dtype=False, rtol=1e-12
+            )
+            print(f"✅ {name}: {len(engine)} suburbs match")
+        except AssertionError as e:
+            failures += 1
+            print(f"❌ {name}: {e}")
+
+    sys.exit(1 if failures else 0)